@@ -0,0 +1,103 @@
+"""Numeric kernels for chart rendering.
+
+Compiled with numba when it is installed; otherwise equivalent vectorized
+numpy implementations are used.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Optional speedup; fall back to numpy
+    njit = None
+
+
+def _sparkline_xy_loop(values, prev_close, width, height, padding, out):
+    """Scale price values into sparkline widget coordinates in one pass.
+
+    Writes the (x, y) point for each of the (at least two) values into the
+    preallocated (N, 2) out array, spreading them evenly across the width
+    and scaling them to the height; the range includes prev_close when
+    it's > 0. Returns the y coordinate of prev_close, or -1.0 if it isn't set.
+    """
+    n = values.shape[0]
+    lo = float(values[0])
+    hi = lo
+    for i in range(1, n):
+        v = float(values[i])
+        lo = min(lo, v)
+        hi = max(hi, v)
+
+    # Include prev_close in the range calculation if it's set
+    if prev_close > 0:
+        lo = min(lo, prev_close)
+        hi = max(hi, prev_close)
+
+    val_range = hi - lo if hi != lo else 1.0
+    y_scale = (height - 2 * padding) / val_range
+    x_step = (width - 2 * padding) / (n - 1)
+    bottom = height - padding
+    for i in range(n):
+        out[i, 0] = padding + i * x_step
+        out[i, 1] = bottom - (float(values[i]) - lo) * y_scale
+
+    if prev_close > 0:
+        return bottom - (prev_close - lo) * y_scale
+    return -1.0
+
+
+def _sparkline_xy_numpy(values, prev_close, width, height, padding, out):
+    """Vectorized numpy equivalent of _sparkline_xy_loop."""
+    lo = float(values.min())
+    hi = float(values.max())
+
+    # Include prev_close in the range calculation if it's set
+    if prev_close > 0:
+        lo = min(lo, prev_close)
+        hi = max(hi, prev_close)
+
+    val_range = hi - lo if hi != lo else 1.0
+    y_scale = (height - 2 * padding) / val_range
+    bottom = height - padding
+    out[:, 0] = np.linspace(padding, width - padding, len(values))
+    np.subtract(values, lo, out=out[:, 1], dtype=out.dtype)
+    out[:, 1] *= -y_scale
+    out[:, 1] += bottom
+
+    if prev_close > 0:
+        return bottom - (prev_close - lo) * y_scale
+    return -1.0
+
+
+# build_sparkline_xy(values, prev_close, width, height, padding, out) -> float
+if njit is not None:
+    build_sparkline_xy = njit(cache=True, fastmath=True)(_sparkline_xy_loop)
+else:
+    build_sparkline_xy = _sparkline_xy_numpy
+
+
+def downsample_minmax(values: np.ndarray, buckets: int) -> np.ndarray:
+    """Reduce values to about two points per bucket, keeping the envelope.
+
+    Each of the evenly sized buckets contributes its minimum and maximum,
+    in the order that follows the bucket's trend; the first and last values
+    are kept as is. Values that already fit in 2 * buckets points are
+    returned unchanged.
+    """
+    n = len(values)
+    if buckets < 1 or n <= 2 * buckets:
+        return values
+
+    starts = np.linspace(0, n, buckets + 1).astype(np.intp)
+    ends = starts[1:]
+    starts = starts[:-1]
+    mins = np.minimum.reduceat(values, starts)
+    maxs = np.maximum.reduceat(values, starts)
+    rising = values[ends - 1] >= values[starts]
+
+    out = np.empty(2 * buckets + 2, dtype=values.dtype)
+    out[0] = values[0]
+    out[1:-1:2] = np.where(rising, mins, maxs)
+    out[2:-1:2] = np.where(rising, maxs, mins)
+    out[-1] = values[-1]
+    return out
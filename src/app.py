@@ -5,6 +5,7 @@ import os
 import sys
 from pathlib import Path
 
+from PySide6.QtCore import QByteArray, QObject, QTimer, Slot
 from PySide6.QtWidgets import QApplication
 
 from .config import ConfigManager, get_config_dir
@@ -12,6 +13,46 @@ from .popup import PopupWindow
 from .stock_service import StockService
 from .tray import SystemTrayManager
 
+# Delay before refetching after a watchlist edit, so a burst of edits fetches once
+REFRESH_DEBOUNCE_MS = 200
+
+_MODULE_DIR = Path(__file__).resolve().parent
+
+# Stylesheet locations: installed package first, then a source checkout in
+# the working directory (skipped when it's the same file)
+_STYLE_PATHS: tuple[Path, ...] = tuple(dict.fromkeys((
+    _MODULE_DIR / "styles" / "theme.qss",
+    Path.cwd().resolve() / "src" / "styles" / "theme.qss",
+)))
+
+# (path, mtime, contents) of the last stylesheet read
+_STYLE_CACHE: tuple[Path, int, str] | None = None
+
+
+def _read_stylesheet() -> str | None:
+    """Return the QSS stylesheet contents, reusing the cached copy if unchanged."""
+    global _STYLE_CACHE
+
+    if _STYLE_CACHE is not None:
+        path, mtime, content = _STYLE_CACHE
+        try:
+            if path.stat().st_mtime_ns == mtime:
+                return content
+        except OSError:
+            pass
+
+    for style_path in _STYLE_PATHS:
+        try:
+            mtime = style_path.stat().st_mtime_ns
+        except OSError:
+            continue
+        with open(style_path, "r") as f:
+            content = f.read()
+        _STYLE_CACHE = (style_path, mtime, content)
+        return content
+
+    return None
+
 
 class SingleInstance:
     """Ensures only one instance of the application runs at a time."""
@@ -43,16 +84,18 @@ class SingleInstance:
                 pass
 
 
-class StockTickerApp:
+class StockTickerApp(QObject):
     """Main application class that coordinates all components."""
 
     def __init__(self):
         self.app = QApplication.instance() or QApplication(sys.argv)
+        super().__init__()
         self.app.setQuitOnLastWindowClosed(False)  # Keep running with tray
 
         # Load configuration
         self.config_manager = ConfigManager()
         self.config = self.config_manager.load()
+        self._watchlist_set: set[str] = set()  # O(1) membership for config.watchlist
 
         # Load stylesheet
         self._load_stylesheet()
@@ -62,9 +105,15 @@ class StockTickerApp:
             self.config.refresh_interval,
             self.config.chart_period
         )
-        self.popup = PopupWindow()
+        self._popup: PopupWindow | None = None  # Built on first use, see popup
+        self._popup_geometry: QByteArray | None = None  # Last saved popup geometry
         self.tray = SystemTrayManager()
 
+        # Coalesces refreshes requested by watchlist edits
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self.stock_service.refresh)
+
         # Setup connections
         self._connect_signals()
 
@@ -73,17 +122,9 @@ class StockTickerApp:
 
     def _load_stylesheet(self):
         """Load the QSS stylesheet."""
-        # Try to load from installed location first, then from source
-        style_paths = [
-            Path(__file__).parent / "styles" / "theme.qss",
-            Path.cwd() / "src" / "styles" / "theme.qss",
-        ]
-
-        for style_path in style_paths:
-            if style_path.exists():
-                with open(style_path, "r") as f:
-                    self.app.setStyleSheet(f.read())
-                break
+        stylesheet = _read_stylesheet()
+        if stylesheet is not None:
+            self.app.setStyleSheet(stylesheet)
 
     def _connect_signals(self):
         """Connect all component signals."""
@@ -92,30 +133,68 @@ class StockTickerApp:
         self.tray.refresh_requested.connect(self.stock_service.refresh)
         self.tray.quit_requested.connect(self._quit)
 
-        # Popup signals
-        self.popup.closed.connect(self._on_popup_closed)
-        self.popup.stock_added.connect(self._add_stock)
-        self.popup.stock_removed.connect(self._remove_stock)
-        self.popup.stock_moved.connect(self._move_stock)
-        self.popup.refresh_interval_changed.connect(self._on_refresh_interval_changed)
-        self.popup.chart_period_changed.connect(self._on_chart_period_changed)
-
         # Stock service signals
-        self.stock_service.stocks_updated.connect(self.popup.update_stocks)
+        self.stock_service.stocks_updated.connect(self._on_stocks_updated)
 
     def _initialize(self):
         """Initialize the application state."""
-        # Set popup position and size from config
-        self.popup.set_position(*self.config.popup_position)
-        self.popup.resize(*self.config.popup_size)
+        # Set watchlist
+        self._set_watchlist(self.config.watchlist)
+
+    @property
+    def popup(self) -> PopupWindow:
+        """The popup window, constructed and wired up on first access."""
+        if self._popup is None:
+            self._popup = self._create_popup()
+        return self._popup
+
+    def _create_popup(self) -> PopupWindow:
+        """Build the popup window from the current config and connect it."""
+        popup = PopupWindow()
+
+        # Restore the saved geometry, falling back to the config values. Those
+        # aren't written back to the config file, so leave _popup_geometry
+        # unset to have the first close store them in the UI state instead
+        geometry = self.config_manager.load_geometry()
+        if geometry is None or not popup.restoreGeometry(geometry):
+            popup.set_position(*self.config.popup_position)
+            popup.resize(*self.config.popup_size)
+            self._popup_geometry = None
+        else:
+            self._popup_geometry = popup.saveGeometry()
 
         # Set current settings in popup
-        self.popup.set_refresh_interval(self.config.refresh_interval)
-        self.popup.set_chart_period(self.config.chart_period)
+        popup.set_refresh_interval(self.config.refresh_interval)
+        popup.set_chart_period(self.config.chart_period)
 
-        # Set watchlist
+        # Popup signals
+        popup.closed.connect(self._on_popup_closed)
+        popup.stock_added.connect(self._add_stock)
+        popup.stock_removed.connect(self._remove_stock)
+        popup.stock_moved.connect(self._move_stock)
+        popup.refresh_interval_changed.connect(self._on_refresh_interval_changed)
+        popup.chart_period_changed.connect(self._on_chart_period_changed)
+
+        # Show any data that arrived before the popup existed
+        stocks = self.stock_service.cached_stocks()
+        if stocks:
+            popup.update_stocks(stocks)
+
+        return popup
+
+    @Slot(list)
+    def _on_stocks_updated(self, stocks: list):
+        """Forward fresh stock data to the popup, if it has been built."""
+        if self._popup is not None:
+            self._popup.update_stocks(stocks)
+
+    def _set_watchlist(self, symbols: list[str]):
+        """Replace the watchlist, keeping the membership set and service in sync."""
+        self.config.watchlist = list(symbols)
+        self._watchlist_set = set(self.config.watchlist)
         self.stock_service.set_symbols(self.config.watchlist)
 
+    @Slot()
     def _toggle_popup(self):
         """Toggle the popup window visibility."""
         if self.popup.isVisible():
@@ -128,39 +207,52 @@ class StockTickerApp:
 
         self.tray.update_show_action(self.popup.isVisible())
 
+    @Slot()
     def _on_popup_closed(self):
         """Handle popup window close."""
         self._save_popup_geometry()
         self.tray.update_show_action(False)
 
     def _save_popup_geometry(self):
-        """Save popup position and size to config."""
-        self.config_manager.update(
-            popup_position=self.popup.get_position(),
-            popup_size=self.popup.get_size()
-        )
+        """Save popup position and size to the UI state store."""
+        if self._popup is None:
+            return
+
+        geometry = self._popup.saveGeometry()
+        if geometry == self._popup_geometry:
+            return
+
+        self._popup_geometry = geometry
+        self.config_manager.save_geometry(geometry)
 
+    @Slot(str)
     def _add_stock(self, symbol: str):
         """Add a stock to the watchlist."""
-        symbol = symbol.upper().strip()
-        if symbol and symbol not in self.config.watchlist:
-            self.config.watchlist.append(symbol)
-            self.config_manager.save(self.config)
-            self.stock_service.add_symbol(symbol)
-            self.stock_service.refresh()
+        symbol = symbol.strip().upper()
+        if not symbol or symbol in self._watchlist_set:
+            return
+
+        self.config.watchlist.append(symbol)
+        self._watchlist_set.add(symbol)
+        self.config_manager.schedule_save(self.config)
+        self.stock_service.add_symbol(symbol)
+        self._refresh_timer.start(REFRESH_DEBOUNCE_MS)
 
+    @Slot(str)
     def _remove_stock(self, symbol: str):
         """Remove a stock from the watchlist."""
-        if symbol in self.config.watchlist:
+        if symbol in self._watchlist_set:
             self.config.watchlist.remove(symbol)
-            self.config_manager.save(self.config)
+            self._watchlist_set.discard(symbol)
+            self.config_manager.schedule_save(self.config)
             self.stock_service.remove_symbol(symbol)
             # Update display to remove the widget
-            self.stock_service.refresh()
+            self._refresh_timer.start(REFRESH_DEBOUNCE_MS)
 
+    @Slot(str, int)
     def _move_stock(self, symbol: str, direction: int):
         """Move a stock up or down in the watchlist. direction: -1=up, 1=down."""
-        if symbol not in self.config.watchlist:
+        if symbol not in self._watchlist_set:
             return
 
         idx = self.config.watchlist.index(symbol)
@@ -174,45 +266,61 @@ class StockTickerApp:
         self.config.watchlist[idx], self.config.watchlist[new_idx] = \
             self.config.watchlist[new_idx], self.config.watchlist[idx]
 
-        self.config_manager.save(self.config)
-        self.stock_service.set_symbols(self.config.watchlist)
-        self.stock_service.refresh()
+        self.config_manager.schedule_save(self.config)
+        # Same symbols in a new order: redisplay cached data, no refetch needed
+        self.stock_service.reorder_symbols(self.config.watchlist)
 
+    @Slot(int)
     def _on_refresh_interval_changed(self, seconds: int):
         """Handle refresh interval change from popup."""
+        if seconds == self.config.refresh_interval:
+            return
         self.config.refresh_interval = seconds
-        self.config_manager.save(self.config)
+        self.config_manager.schedule_save(self.config)
         self.stock_service.set_refresh_interval(seconds)
 
+    @Slot(str)
     def _on_chart_period_changed(self, period: str):
         """Handle chart period change from popup."""
+        if period == self.config.chart_period:
+            return
         self.config.chart_period = period
-        self.config_manager.save(self.config)
+        self.config_manager.schedule_save(self.config)
         self.stock_service.set_chart_period(period)
         # Refresh to get new historical data
         self.stock_service.refresh()
 
+    @Slot()
     def _quit(self):
-        """Quit the application."""
+        """Quit the application, letting run() return from the event loop."""
         self._save_popup_geometry()
+
+        # Nothing should react to signals emitted while tearing down
+        self.tray.blockSignals(True)
+        if self._popup is not None:
+            self._popup.blockSignals(True)
+
+        self._refresh_timer.stop()
         self.stock_service.stop()
+        self.config_manager.flush()
+
         self.tray.hide()
-        self.popup.close()
+        if self._popup is not None:
+            self._popup.close()
         self.app.quit()
-        sys.exit(0)
 
     def run(self) -> int:
         """Run the application."""
         # Show tray icon
         self.tray.show()
 
+        # Start stock service so the first fetch overlaps building the popup
+        self.stock_service.start()
+
         # Show popup initially
         self.popup.show()
         self.tray.update_show_action(True)
 
-        # Start stock service
-        self.stock_service.start()
-
         return self.app.exec()
 
 
@@ -1,12 +1,66 @@
 """Configuration management for the stock ticker app."""
 
 import json
+import logging
+import os
 import sys
 from pathlib import Path
 from typing import Any
 
+from PySide6.QtCore import (
+    QByteArray,
+    QMutex,
+    QMutexLocker,
+    QRunnable,
+    QSettings,
+    QThreadPool,
+    QTimer,
+)
+
 from .models import AppConfig
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Only needed for the opt-in binary config format
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Set to "msgpack" to keep the config as compact binary config.msgpack
+# instead of config.json (requires msgpack; JSON remains the default since
+# it can be edited by hand). Once converted, config.msgpack is used whether
+# or not this is set.
+CONFIG_FORMAT_ENV = "STOCK_TICKER_CONFIG_FORMAT"
+
+# Delay before a scheduled save is written, so bursts of edits hit the disk once
+SAVE_DEBOUNCE_MS = 500
+
+# Fallback values for fields missing from the config file (treat as read-only)
+_DEFAULTS = AppConfig()
+
+
+def _dumps(data: dict[str, Any], binary: bool = False) -> bytes:
+    """Serialize config data to indented JSON bytes, or msgpack if binary."""
+    if binary:
+        return msgpack.packb(data, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def _loads(raw: bytes, binary: bool = False) -> Any:
+    """Parse JSON bytes, or msgpack if binary, into config data."""
+    if binary:
+        return msgpack.unpackb(raw, raw=False)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 
 def get_config_dir() -> Path:
     """Return the platform-appropriate config directory."""
@@ -15,6 +69,57 @@ def get_config_dir() -> Path:
     return Path.home() / ".config" / "stock-ticker"
 
 
+def _write_file(path: Path, payload: bytes) -> None:
+    """Write payload durably via an fsynced temp file and rename."""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())  # Make the new contents durable before the rename
+    os.replace(tmp_path, path)
+
+
+class _SaveRunnable(QRunnable):
+    """Writes an already-encoded config payload on a worker thread."""
+
+    def __init__(self, manager: "ConfigManager", payload: bytes):
+        super().__init__()
+        self._manager = manager
+        self._payload = payload
+
+    def run(self) -> None:
+        self._manager._write_payload(self._payload)
+
+
+def _migrate_to_msgpack(json_path: Path) -> Path:
+    """Convert an existing JSON config to msgpack once; return the msgpack path."""
+    msgpack_path = json_path.with_suffix(".msgpack")
+    if json_path.exists() and not msgpack_path.exists():
+        try:
+            data = _loads(json_path.read_bytes())
+        except ValueError:
+            return msgpack_path  # Unreadable; start from defaults like load() would
+        _write_file(msgpack_path, _dumps(data, binary=True))
+        json_path.unlink()
+    return msgpack_path
+
+
+def _choose_config_path(json_path: Path) -> Path:
+    """Return the config file to use, migrating to msgpack if asked to."""
+    msgpack_path = json_path.with_suffix(".msgpack")
+    wants_msgpack = os.environ.get(CONFIG_FORMAT_ENV) == "msgpack"
+    if msgpack is not None and (wants_msgpack or msgpack_path.exists()):
+        return _migrate_to_msgpack(json_path)
+
+    if wants_msgpack:
+        logger.warning("%s=msgpack needs the msgpack package; using %s",
+                       CONFIG_FORMAT_ENV, json_path)
+    elif msgpack_path.exists():
+        logger.warning("Can't read %s without the msgpack package; using %s",
+                       msgpack_path, json_path)
+    return json_path
+
+
 class ConfigManager:
     """Manages loading and saving application configuration."""
 
@@ -22,32 +127,63 @@ class ConfigManager:
         if config_path is None:
             config_dir = get_config_dir()
             config_dir.mkdir(parents=True, exist_ok=True)
-            self.config_path = config_dir / "config.json"
+            self.config_path = _choose_config_path(config_dir / "config.json")
         else:
             self.config_path = Path(config_path)
+        self._binary = self.config_path.suffix == ".msgpack"
 
         self._config: AppConfig | None = None
+        self._mtime: int | None = None  # mtime of the file when last read/written
+        self._last_saved: dict[str, Any] | None = None  # data of the last write
+        self._dirty = False
+
+        # Window geometry is UI state rather than user settings: keep it in a
+        # Qt-managed INI file next to the config, which batches its own writes
+        self._ui_state = QSettings(
+            str(self.config_path.with_name("ui-state.ini")), QSettings.IniFormat
+        )
+
+        # Scheduled saves are written on a single worker thread so the fsync
+        # never stalls the GUI thread; the mutex serializes them with save()
+        self._write_lock = QMutex()
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(1)
+
+        # Debounce timer for schedule_save()
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.timeout.connect(self._flush_in_background)
 
     def load(self) -> AppConfig:
-        """Load configuration from file or return defaults."""
-        if self._config is not None:
+        """Load configuration from file or return defaults.
+
+        The result is cached and only re-read if the file was modified
+        externally since it was last loaded or written. While a background
+        write is in flight the file's mtime can't be compared with _mtime,
+        which that write updates, so the cached config is kept.
+        """
+        if self._config is not None and (self._dirty or self._pool.activeThreadCount()):
+            return self._config
+        mtime = self._get_mtime()
+        if self._config is not None and mtime == self._mtime:
             return self._config
 
-        if self.config_path.exists():
+        self._mtime = mtime
+        if mtime is not None:
             try:
-                with open(self.config_path, "r") as f:
-                    data = json.load(f)
-                # Use defaults from a fresh AppConfig instance
-                defaults = AppConfig()
+                data = _loads(self.config_path.read_bytes(), self._binary)
+                defaults = _DEFAULTS
                 self._config = AppConfig(
-                    watchlist=data.get("watchlist", defaults.watchlist),
+                    watchlist=list(data.get("watchlist", defaults.watchlist)),
                     refresh_interval=data.get("refresh_interval", defaults.refresh_interval),
                     chart_period=data.get("chart_period", defaults.chart_period),
-                    popup_position=tuple(data.get("popup_position", list(defaults.popup_position))),
-                    popup_size=tuple(data.get("popup_size", list(defaults.popup_size))),
+                    popup_position=(tuple(data["popup_position"]) if "popup_position" in data
+                                    else defaults.popup_position),
+                    popup_size=(tuple(data["popup_size"]) if "popup_size" in data
+                                else defaults.popup_size),
                     theme=data.get("theme", defaults.theme),
                 )
-            except (json.JSONDecodeError, KeyError, TypeError):
+            except (ValueError, KeyError, TypeError):  # JSONDecodeError is a ValueError
                 self._config = AppConfig()
         else:
             self._config = AppConfig()
@@ -55,18 +191,84 @@ class ConfigManager:
         return self._config
 
     def save(self, config: AppConfig) -> None:
-        """Save configuration to file."""
+        """Save configuration to file immediately.
+
+        Waits for background writes already in flight first, so an older
+        scheduled save can't land on top of this one.
+        """
         self._config = config
-        data = {
-            "watchlist": config.watchlist,
-            "refresh_interval": config.refresh_interval,
-            "chart_period": config.chart_period,
-            "popup_position": list(config.popup_position),
-            "popup_size": list(config.popup_size),
-            "theme": config.theme,
-        }
-        with open(self.config_path, "w") as f:
-            json.dump(data, f, indent=2)
+        self._save_timer.stop()
+        self._pool.waitForDone()
+        self._write(config)
+
+    def schedule_save(self, config: AppConfig) -> None:
+        """Save configuration after a short delay, coalescing repeated calls."""
+        self._config = config
+        self._dirty = True
+        self._save_timer.start(SAVE_DEBOUNCE_MS)
+
+    def flush(self) -> None:
+        """Write any pending scheduled save and UI state to disk now.
+
+        Also waits for background writes already in flight to finish.
+        """
+        self._save_timer.stop()
+        self._pool.waitForDone()
+        if self._dirty and self._config is not None:
+            self._write(self._config)
+        self._ui_state.sync()
+
+    def _flush_in_background(self) -> None:
+        """Hand the pending scheduled save to the worker thread."""
+        if self._dirty and self._config is not None:
+            self._write(self._config, background=True)
+
+    def load_geometry(self) -> QByteArray | None:
+        """Return the saved popup geometry, or None if there isn't one."""
+        geometry = self._ui_state.value("popup/geometry")
+        if isinstance(geometry, QByteArray) and not geometry.isEmpty():
+            return geometry
+        return None
+
+    def save_geometry(self, geometry: QByteArray) -> None:
+        """Store the popup geometry (as from QWidget.saveGeometry())."""
+        self._ui_state.setValue("popup/geometry", geometry)
+
+    def _write(self, config: AppConfig, background: bool = False) -> None:
+        """Write configuration durably via an fsynced temp file and rename.
+
+        The data is snapshotted and encoded on the calling thread; with
+        background=True only the file I/O is moved to the worker thread.
+        Skipped when nothing changed since the last write and the file
+        hasn't been touched on disk since.
+        """
+        data = config.to_json_dict()
+        self._dirty = False
+        # A write in flight holds _last_saved and will update _mtime itself
+        if data == self._last_saved and (self._pool.activeThreadCount()
+                                         or self._get_mtime() == self._mtime):
+            return
+
+        # Encode up front so the file is written with a single write() call
+        payload = _dumps(data, self._binary)
+        self._last_saved = data
+        if background:
+            self._pool.start(_SaveRunnable(self, payload))
+        else:
+            self._write_payload(payload)
+
+    def _write_payload(self, payload: bytes) -> None:
+        """Write encoded config data to disk (called from either thread)."""
+        with QMutexLocker(self._write_lock):
+            _write_file(self.config_path, payload)
+            self._mtime = self._get_mtime()
+
+    def _get_mtime(self) -> int | None:
+        """Return the config file's modification time, or None if missing."""
+        try:
+            return self.config_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
 
     def update(self, **kwargs: Any) -> AppConfig:
         """Update specific config values and save."""
@@ -2,10 +2,20 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from types import MappingProxyType
+from typing import Any, Optional
 
+import numpy as np
 
-@dataclass
+# Change colors indexed by sign of the change + 1: down, flat, up
+_CHANGE_COLORS = (
+    "#F44336",  # Red
+    "#9E9E9E",  # Gray
+    "#4CAF50",  # Green
+)
+
+
+@dataclass(slots=True)
 class Stock:
     """Represents a stock with its current price information."""
     symbol: str
@@ -16,7 +26,15 @@ class Stock:
     prev_close: float = 0.0  # Previous day's close price
     last_updated: Optional[datetime] = None
     error: Optional[str] = None
-    history: list[float] = field(default_factory=list)  # Historical prices for chart
+    # Historical prices for chart; compared separately since arrays don't
+    # support == as a boolean
+    history: np.ndarray = field(
+        default_factory=lambda: np.empty(0, dtype=np.float32), compare=False
+    )
+
+    def __post_init__(self):
+        # Accept any sequence of prices, but store a float32 array
+        self.history = np.asarray(self.history, dtype=np.float32)
 
     @property
     def is_up(self) -> bool:
@@ -28,23 +46,21 @@ class Stock:
 
     @property
     def change_color(self) -> str:
-        if self.change > 0:
-            return "#4CAF50"  # Green
-        elif self.change < 0:
-            return "#F44336"  # Red
-        return "#9E9E9E"  # Gray
+        change = self.change
+        return _CHANGE_COLORS[(change > 0) - (change < 0) + 1]
 
 
-# Refresh interval options (in seconds)
-REFRESH_INTERVALS = {
+# Refresh interval options (in seconds), and the reverse seconds -> label lookup
+REFRESH_INTERVALS = MappingProxyType({
     "1 min": 60,
     "3 min": 180,
     "5 min": 300,
     "10 min": 600,
-}
+})
+REFRESH_INTERVAL_LABELS = MappingProxyType({v: k for k, v in REFRESH_INTERVALS.items()})
 
-# Chart period options
-CHART_PERIODS = {
+# Chart period options, and the reverse period -> label lookup
+CHART_PERIODS = MappingProxyType({
     "1 day": "1d",
     "1 week": "5d",
     "1 month": "1mo",
@@ -52,10 +68,11 @@ CHART_PERIODS = {
     "5 year": "5y",
     "10 year": "10y",
     "All time": "max",
-}
+})
+CHART_PERIOD_LABELS = MappingProxyType({v: k for k, v in CHART_PERIODS.items()})
 
 
-@dataclass
+@dataclass(slots=True)
 class AppConfig:
     """Application configuration."""
     watchlist: list[str] = field(default_factory=lambda: ["^DJI", "^IXIC", "^GSPC", "^NYA"])
@@ -64,3 +81,18 @@ class AppConfig:
     popup_position: tuple[int, int] = (100, 100)
     popup_size: tuple[int, int] = (320, 400)
     theme: str = "dark"
+
+    def to_json_dict(self) -> dict[str, Any]:
+        """Return the config as a JSON-serializable dict.
+
+        The watchlist is copied so the result doesn't change with later
+        in-place edits to the config. The popup position and size are left
+        out: the popup geometry is kept in the UI state store, and these are
+        only read from older config files as its initial value.
+        """
+        return {
+            "watchlist": [*self.watchlist],
+            "refresh_interval": self.refresh_interval,
+            "chart_period": self.chart_period,
+            "theme": self.theme,
+        }
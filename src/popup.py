@@ -2,15 +2,69 @@
 
 from datetime import datetime
 
-from PySide6.QtCore import Qt, QPoint, Signal, QPropertyAnimation, QEasingCurve
-from PySide6.QtGui import QCursor, QPainter, QPen, QColor, QPainterPath
+import numpy as np
+import shiboken6
+from PySide6.QtCore import Qt, QPoint, QPointF, QTimer, Signal, Slot
+from PySide6.QtGui import QCursor, QPainter, QPen, QColor, QPixmap, QPolygonF
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QLineEdit, QScrollArea, QFrame, QSizeGrip, QGraphicsOpacityEffect,
+    QLineEdit, QScrollArea, QFrame, QSizeGrip,
     QComboBox
 )
 
-from .models import Stock, REFRESH_INTERVALS, CHART_PERIODS
+from ._kernels import build_sparkline_xy, downsample_minmax
+from .models import (
+    Stock, REFRESH_INTERVALS, REFRESH_INTERVAL_LABELS, CHART_PERIODS, CHART_PERIOD_LABELS
+)
+
+# Removed stock widgets kept for reuse, so symbol churn doesn't rebuild them
+WIDGET_POOL_SIZE = 8
+
+# How long a stock item stays highlighted after its price changes
+FLASH_DURATION_MS = 300
+
+# Longer sparkline lines are drawn in segments of at most this many points,
+# since some paint engines (notably Quartz on macOS) slow down a lot on
+# very long polylines
+MAX_POLYLINE_POINTS = 256
+
+# Sparklines shorter than this (the widget allows 22-25px) are drawn
+# without antialiasing, where it costs more than it visibly improves
+ANTIALIAS_MIN_HEIGHT = 25
+
+
+def _polygon_view(polygon: QPolygonF) -> np.ndarray:
+    """Return a writable Nx2 array viewing a polygon's point buffer.
+
+    Lets numpy code fill in coordinates without creating a QPointF per
+    point from Python. The view is only valid until the polygon is
+    resized or copied, so get a fresh one for each use.
+    """
+    if polygon.isEmpty():
+        return np.empty((0, 2), dtype=np.float64)
+    # QPointF is two packed doubles, so the buffer is an Nx2 float64 array.
+    # data() also detaches the polygon if its points are shared.
+    buffer = shiboken6.VoidPtr(polygon.data(), polygon.size() * 16, True)
+    return np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)
+
+
+def _split_polyline(polygon: QPolygonF, points: np.ndarray) -> list[QPolygonF]:
+    """Split a polyline into segments of at most MAX_POLYLINE_POINTS points.
+
+    Consecutive segments share their end point so the line stays connected.
+    points is the polygon's coordinates (as from _polygon_view()).
+    """
+    if len(points) <= MAX_POLYLINE_POINTS:
+        return [polygon]
+    segments = []
+    step = MAX_POLYLINE_POINTS - 1
+    for start in range(0, len(points) - 1, step):
+        chunk = points[start:start + MAX_POLYLINE_POINTS]
+        segment = QPolygonF()
+        segment.resize(len(chunk))
+        _polygon_view(segment)[:] = chunk
+        segments.append(segment)
+    return segments
 
 
 class SparklineWidget(QWidget):
@@ -18,43 +72,125 @@ class SparklineWidget(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.data: list[float] = []
+        self.data: np.ndarray = np.empty(0, dtype=np.float32)
         self.is_up: bool = True  # Based on daily change (vs previous close)
         self.prev_close: float = 0.0  # Previous day's close price
+        # Geometry cached between repaints, rebuilt on data change or resize
+        self._geometry_dirty = True
+        self._line_poly: QPolygonF | None = None  # Reused while the length is unchanged
+        self._points: np.ndarray | None = None  # View of _line_poly's (x, y) buffer
+        self._fill_poly: QPolygonF | None = None
+        self._line_segments: list[QPolygonF] = []  # _line_poly split for drawing
+        self._prev_close_y: float | None = None
+        self._pixmap: QPixmap | None = None  # Rendered chart, blitted on repaint
+        self._update_pending = False  # A repaint is scheduled for the next loop turn
         self.setMinimumSize(60, 22)
         self.setMaximumHeight(25)
 
-    def set_data(self, data: list[float], is_up: bool = True, prev_close: float = 0.0):
-        """Set the data points for the sparkline."""
+    def set_data(self, data: np.ndarray, is_up: bool = True, prev_close: float = 0.0):
+        """Set the data points for the sparkline.
+
+        Does nothing if the data is unchanged, so the cached geometry is kept.
+        """
+        data = np.asarray(data, dtype=np.float32)
+        if (is_up == self.is_up and prev_close == self.prev_close
+                and np.array_equal(data, self.data)):
+            return
         self.data = data
         self.is_up = is_up
         self.prev_close = prev_close
-        self.update()
+        self._invalidate()
+        # Coalesce bursts of set_data() into a single update() call
+        if not self._update_pending:
+            self._update_pending = True
+            QTimer.singleShot(0, self, self._flush_update)
+
+    @Slot()
+    def _flush_update(self):
+        """Request the repaint scheduled by set_data()."""
+        if self._update_pending:
+            self._update_pending = False
+            self.update()
+
+    def resizeEvent(self, event):
+        """Invalidate the cached geometry when the size changes."""
+        if event.size() != event.oldSize():
+            self._invalidate()
+        super().resizeEvent(event)
+
+    def _invalidate(self) -> None:
+        """Drop the cached geometry and pixmap so the next paint rebuilds them."""
+        self._geometry_dirty = True
+        self._pixmap = None
+
+    def _build_geometry(self) -> None:
+        """Scale the data into widget coordinates and build the polygons."""
+        width = self.width()
+        height = self.height()
+        padding = 2
+
+        # More than about two points per pixel column can't be seen, so long
+        # histories are reduced to their min/max envelope first
+        values = downsample_minmax(self.data, int(width - 2 * padding))
+
+        # The kernel writes straight into the line polygon's point buffer;
+        # the polygon is only reallocated when the number of points changes
+        line_poly = self._line_poly
+        if line_poly is None or line_poly.size() != len(values):
+            line_poly = self._line_poly = QPolygonF()
+            line_poly.resize(len(values))
+        points = self._points = _polygon_view(line_poly)
+        prev_close_y = build_sparkline_xy(
+            values, float(self.prev_close), float(width), float(height),
+            float(padding), points,
+        )
+
+        # The fill is the price line closed along the bottom edge (the
+        # prepend makes the fill detach into its own copy of the points)
+        bottom = height - padding
+        fill_poly = QPolygonF(line_poly)
+        fill_poly.prepend(QPointF(points[0, 0], bottom))
+        fill_poly.append(QPointF(width - padding, bottom))
+        self._fill_poly = fill_poly
+        self._line_segments = _split_polyline(line_poly, points)
+
+        self._prev_close_y = prev_close_y if prev_close_y >= 0 else None
+        self._geometry_dirty = False
 
     def paintEvent(self, event):
-        """Draw the sparkline chart."""
+        """Draw the sparkline chart from the cached pixmap."""
         painter = QPainter(self)
         painter.eraseRect(self.rect())
 
-        if not self.data or len(self.data) < 2:
+        if len(self.data) < 2:
             painter.end()
             return
-        painter.setRenderHint(QPainter.Antialiasing)
 
-        # Calculate bounds
+        dpr = self.devicePixelRatioF()
+        if self._pixmap is None or self._pixmap.devicePixelRatio() != dpr:
+            self._pixmap = self._render_pixmap(dpr)
+        painter.drawPixmap(0, 0, self._pixmap)
+        painter.end()
+
+    def _render_pixmap(self, dpr: float) -> QPixmap:
+        """Render the chart into a transparent pixmap at the given pixel ratio."""
+        pixmap = QPixmap(self.size() * dpr)
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        self._draw(painter)
+        painter.end()
+        return pixmap
+
+    def _draw(self, painter: QPainter) -> None:
+        """Paint the sparkline chart."""
+        if self.height() >= ANTIALIAS_MIN_HEIGHT:
+            painter.setRenderHint(QPainter.Antialiasing)
+
         width = self.width()
-        height = self.height()
         padding = 2
-
-        min_val = min(self.data)
-        max_val = max(self.data)
-
-        # Include prev_close in the range calculation if it's set
-        if self.prev_close > 0:
-            min_val = min(min_val, self.prev_close)
-            max_val = max(max_val, self.prev_close)
-
-        val_range = max_val - min_val if max_val != min_val else 1
+        if self._geometry_dirty:
+            self._build_geometry()
 
         # Color based on daily change (current price vs previous close)
         if self.is_up:
@@ -65,45 +201,36 @@ class SparklineWidget(QWidget):
             fill_color = QColor(244, 67, 54, 50)  # Red with alpha
 
         # Draw previous close line first (so it's behind the chart)
-        if self.prev_close > 0 and min_val <= self.prev_close <= max_val:
-            prev_close_y = height - padding - ((self.prev_close - min_val) / val_range) * (height - 2 * padding)
+        if self._prev_close_y is not None:
+            prev_close_y = self._prev_close_y
             pen = QPen(QColor("#FFD700"))  # Gold/yellow color
             pen.setWidth(1)
             pen.setStyle(Qt.DashLine)
             painter.setPen(pen)
             painter.drawLine(int(padding), int(prev_close_y), int(width - padding), int(prev_close_y))
 
-        # Build the price path
-        path = QPainterPath()
-        fill_path = QPainterPath()
-
-        x_step = (width - 2 * padding) / (len(self.data) - 1)
-
-        for i, val in enumerate(self.data):
-            x = padding + i * x_step
-            y = height - padding - ((val - min_val) / val_range) * (height - 2 * padding)
-
-            if i == 0:
-                path.moveTo(x, y)
-                fill_path.moveTo(x, height - padding)
-                fill_path.lineTo(x, y)
-            else:
-                path.lineTo(x, y)
-                fill_path.lineTo(x, y)
-
-        # Complete fill path
-        fill_path.lineTo(width - padding, height - padding)
-        fill_path.closeSubpath()
-
         # Draw fill
-        painter.fillPath(fill_path, fill_color)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(fill_color)
+        painter.drawPolygon(self._fill_poly)
 
         # Draw price line
         pen = QPen(line_color)
         pen.setWidth(2)
         pen.setStyle(Qt.SolidLine)
         painter.setPen(pen)
-        painter.drawPath(path)
+        painter.setBrush(Qt.NoBrush)
+        for segment in self._line_segments:
+            painter.drawPolyline(segment)
+
+
+def _display_key(stock: Stock) -> tuple:
+    """Return the fields of a stock that affect its labels.
+
+    The history is left out: SparklineWidget.set_data() compares it in full.
+    """
+    return (stock.name, stock.price, stock.change, stock.change_percent,
+            stock.prev_close, stock.error)
 
 
 class StockItemWidget(QFrame):
@@ -116,7 +243,13 @@ class StockItemWidget(QFrame):
     def __init__(self, stock: Stock, parent=None):
         super().__init__(parent)
         self.stock = stock
+        self._last_key: tuple | None = None  # _display_key() of the shown data
         self.setObjectName("StockItem")
+
+        # Ends the price-change highlight (see _animate_change)
+        self._flash_timer = QTimer(self)
+        self._flash_timer.setSingleShot(True)
+        self._flash_timer.timeout.connect(self._end_flash)
         self._setup_ui()
         self._update_display()
 
@@ -200,11 +333,12 @@ class StockItemWidget(QFrame):
 
     def _update_display(self):
         """Update the display with current stock data."""
+        self._last_key = _display_key(self.stock)
         if self.stock.error:
             self.name_label.setText("Error loading")
             self.price_label.setText("--")
             self.change_label.setText(self.stock.error[:30])
-            self.change_label.setObjectName("StockChangeFlat")
+            self._set_change_style("StockChangeFlat")
             return
 
         # Truncate name if too long
@@ -223,18 +357,18 @@ class StockItemWidget(QFrame):
 
         # Set color based on change direction
         if self.stock.is_up:
-            self.change_label.setObjectName("StockChangeUp")
+            self._set_change_style("StockChangeUp")
         elif self.stock.is_down:
-            self.change_label.setObjectName("StockChangeDown")
+            self._set_change_style("StockChangeDown")
         else:
-            self.change_label.setObjectName("StockChangeFlat")
+            self._set_change_style("StockChangeFlat")
 
-        # Force style refresh
-        self.change_label.style().unpolish(self.change_label)
-        self.change_label.style().polish(self.change_label)
+        self._update_sparkline()
 
-        # Update sparkline (color based on daily change vs previous close)
-        if self.stock.history:
+    def _update_sparkline(self):
+        """Show the stock's history, or hide the sparkline if it has none."""
+        # Color based on daily change (current price vs previous close)
+        if len(self.stock.history):
             self.sparkline.set_data(
                 self.stock.history,
                 is_up=self.stock.change >= 0,
@@ -244,10 +378,35 @@ class StockItemWidget(QFrame):
         else:
             self.sparkline.hide()
 
+    def _set_change_style(self, object_name: str):
+        """Apply the change label's color class, repolishing only if it changed."""
+        if self.change_label.objectName() == object_name:
+            return
+        self.change_label.setObjectName(object_name)
+        # Force style refresh
+        self.change_label.style().unpolish(self.change_label)
+        self.change_label.style().polish(self.change_label)
+
+    def rebind(self, stock: Stock):
+        """Show a different stock, reusing the existing child widgets."""
+        if self._flash_timer.isActive():
+            self._flash_timer.stop()
+            self._end_flash()
+        self.stock = stock
+        self.symbol_label.setText(stock.symbol)
+        self._update_display()
+
     def update_stock(self, stock: Stock):
-        """Update with new stock data."""
+        """Update with new stock data.
+
+        Skips redrawing the labels (and the flash animation) if none of
+        them changed; the sparkline skips unchanged histories itself.
+        """
         old_price = self.stock.price
         self.stock = stock
+        if _display_key(stock) == self._last_key:
+            self._update_sparkline()
+            return
         self._update_display()
 
         # Animate if price changed
@@ -255,17 +414,27 @@ class StockItemWidget(QFrame):
             self._animate_change()
 
     def _animate_change(self):
-        """Brief flash animation on price change."""
-        effect = QGraphicsOpacityEffect(self)
-        self.setGraphicsEffect(effect)
-
-        anim = QPropertyAnimation(effect, b"opacity", self)
-        anim.setDuration(300)
-        anim.setStartValue(0.5)
-        anim.setEndValue(1.0)
-        anim.setEasingCurve(QEasingCurve.OutCubic)
-        anim.finished.connect(lambda: self.setGraphicsEffect(None))
-        anim.start(QPropertyAnimation.DeleteWhenStopped)
+        """Briefly highlight the item after a price change.
+
+        Toggles a stylesheet property ([flash="true"] in theme.qss) rather
+        than using a QGraphicsEffect, which would render the whole item
+        offscreen for the duration of the animation.
+        """
+        if not self._flash_timer.isActive():
+            self._set_flash(True)
+        self._flash_timer.start(FLASH_DURATION_MS)
+
+    @Slot()
+    def _end_flash(self):
+        """Remove the price-change highlight."""
+        self._set_flash(False)
+
+    def _set_flash(self, flash: bool):
+        """Set the flash style property and restyle the item."""
+        self.setProperty("flash", flash)
+        # Force style refresh
+        self.style().unpolish(self)
+        self.style().polish(self)
 
 
 class PopupWindow(QWidget):
@@ -290,6 +459,7 @@ class PopupWindow(QWidget):
 
         self._drag_position: QPoint | None = None
         self._stock_widgets: dict[str, StockItemWidget] = {}
+        self._widget_pool: list[StockItemWidget] = []  # Detached, hidden widgets
 
         self._setup_ui()
         self.setMinimumSize(300, 350)
@@ -433,11 +603,13 @@ class PopupWindow(QWidget):
 
         parent_layout.addWidget(add_section)
 
+    @Slot()
     def _on_close(self):
         """Handle close button click - hide instead of quit."""
         self.hide()
         self.closed.emit()
 
+    @Slot()
     def _on_add_stock(self):
         """Handle add stock button click."""
         symbol = self.symbol_input.text().strip().upper()
@@ -445,19 +617,23 @@ class PopupWindow(QWidget):
             self.stock_added.emit(symbol)
             self.symbol_input.clear()
 
+    @Slot(str)
     def _on_remove_stock(self, symbol: str):
         """Handle remove stock button click."""
         self.stock_removed.emit(symbol)
 
+    @Slot(str, int)
     def _on_move_stock(self, symbol: str, direction: int):
         """Handle move stock up/down. direction: -1=up, 1=down."""
         self.stock_moved.emit(symbol, direction)
 
+    @Slot(str)
     def _on_refresh_changed(self, text: str):
         """Handle refresh interval change."""
         if text in REFRESH_INTERVALS:
             self.refresh_interval_changed.emit(REFRESH_INTERVALS[text])
 
+    @Slot(str)
     def _on_chart_period_changed(self, text: str):
         """Handle chart period change."""
         if text in CHART_PERIODS:
@@ -465,42 +641,46 @@ class PopupWindow(QWidget):
 
     def set_refresh_interval(self, seconds: int):
         """Set the current refresh interval in the combo box."""
-        for label, value in REFRESH_INTERVALS.items():
-            if value == seconds:
-                self.refresh_combo.blockSignals(True)
-                self.refresh_combo.setCurrentText(label)
-                self.refresh_combo.blockSignals(False)
-                break
+        label = REFRESH_INTERVAL_LABELS.get(seconds)
+        if label:
+            self.refresh_combo.blockSignals(True)
+            self.refresh_combo.setCurrentText(label)
+            self.refresh_combo.blockSignals(False)
 
     def set_chart_period(self, period: str):
         """Set the current chart period in the combo box."""
-        for label, value in CHART_PERIODS.items():
-            if value == period:
-                self.chart_combo.blockSignals(True)
-                self.chart_combo.setCurrentText(label)
-                self.chart_combo.blockSignals(False)
-                break
+        label = CHART_PERIOD_LABELS.get(period)
+        if label:
+            self.chart_combo.blockSignals(True)
+            self.chart_combo.setCurrentText(label)
+            self.chart_combo.blockSignals(False)
 
+    @Slot(list)
     def update_stocks(self, stocks: list[Stock]):
         """Update the display with new stock data."""
-        # Remove widgets for stocks no longer in list
-        current_symbols = {s.symbol for s in stocks}
-        for symbol in list(self._stock_widgets.keys()):
-            if symbol not in current_symbols:
-                self._remove_stock_widget(symbol)
-
-        # Update or add widgets in order
-        for i, stock in enumerate(stocks):
-            if stock.symbol in self._stock_widgets:
-                # Update existing widget
-                self._stock_widgets[stock.symbol].update_stock(stock)
-                # Ensure correct position (move to index i)
-                widget = self._stock_widgets[stock.symbol]
-                self.stock_layout.removeWidget(widget)
-                self.stock_layout.insertWidget(i, widget)
-            else:
-                # Add new widget at correct position
-                self._add_stock_widget_at(stock, i)
+        # Suspend repaints so the whole batch is drawn once at the end
+        self.stock_container.setUpdatesEnabled(False)
+        try:
+            # Remove widgets for stocks no longer in list
+            current_symbols = {s.symbol for s in stocks}
+            for symbol in list(self._stock_widgets.keys()):
+                if symbol not in current_symbols:
+                    self._remove_stock_widget(symbol)
+
+            # Update or add widgets in order
+            for i, stock in enumerate(stocks):
+                widget = self._stock_widgets.get(stock.symbol)
+                if widget is not None:
+                    widget.update_stock(stock)
+                    # Only touch the layout if the widget isn't already at index i
+                    if self.stock_layout.itemAt(i).widget() is not widget:
+                        self.stock_layout.removeWidget(widget)
+                        self.stock_layout.insertWidget(i, widget)
+                else:
+                    # Add new widget at correct position
+                    self._add_stock_widget_at(stock, i)
+        finally:
+            self.stock_container.setUpdatesEnabled(True)
 
         # Update status
         now = datetime.now().strftime("%H:%M:%S")
@@ -514,12 +694,18 @@ class PopupWindow(QWidget):
 
     def _add_stock_widget_at(self, stock: Stock, index: int):
         """Add a new stock widget at a specific position."""
-        widget = StockItemWidget(stock)
-        widget.remove_clicked.connect(self._on_remove_stock)
-        widget.move_up_clicked.connect(lambda s: self._on_move_stock(s, -1))
-        widget.move_down_clicked.connect(lambda s: self._on_move_stock(s, 1))
+        if self._widget_pool:
+            widget = self._widget_pool.pop()
+            widget.rebind(stock)
+        else:
+            widget = StockItemWidget(stock)
+            # Signals carry the widget's current symbol, so these survive rebinding
+            widget.remove_clicked.connect(self._on_remove_stock)
+            widget.move_up_clicked.connect(lambda s: self._on_move_stock(s, -1))
+            widget.move_down_clicked.connect(lambda s: self._on_move_stock(s, 1))
 
         self.stock_layout.insertWidget(index, widget)
+        widget.show()
         self._stock_widgets[stock.symbol] = widget
 
     def _remove_stock_widget(self, symbol: str):
@@ -527,7 +713,11 @@ class PopupWindow(QWidget):
         if symbol in self._stock_widgets:
             widget = self._stock_widgets.pop(symbol)
             self.stock_layout.removeWidget(widget)
-            widget.deleteLater()
+            if len(self._widget_pool) < WIDGET_POOL_SIZE:
+                widget.hide()
+                self._widget_pool.append(widget)
+            else:
+                widget.deleteLater()
 
     def set_position(self, x: int, y: int):
         """Set the popup position."""
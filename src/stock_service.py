@@ -1,47 +1,212 @@
 """Stock data fetching service using yfinance."""
 
-from datetime import datetime
+from datetime import date, datetime
 
+import numpy as np
 import yfinance as yf
-from PySide6.QtCore import QObject, QThread, Signal, QTimer
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot, QTimer
 
 from .models import Stock
 
+try:
+    from curl_cffi import requests as curl_requests
+except ImportError:  # yfinance < 1.0 doesn't need it; use plain requests instead
+    curl_requests = None
 
-class StockFetcher(QThread):
-    """Background thread for fetching stock data."""
+
+def _create_session():
+    """Create the HTTP session shared by all yfinance requests.
+
+    Reusing one session keeps connections alive between refreshes instead
+    of repeating the TCP and TLS handshakes for every request.
+    """
+    if curl_requests is not None:
+        # Yahoo blocks clients without browser TLS impersonation
+        return curl_requests.Session(impersonate="chrome")
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=32))
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+# Shared empty history (Stocks don't modify their history arrays)
+_NO_HISTORY = np.empty(0, dtype=np.float32)
+
+
+def _history_interval(period: str) -> str:
+    """Return the bar interval to chart the given period with."""
+    if period == "1d":
+        return "5m"
+    if period == "5d":
+        return "15m"
+    return "1d"
+
+
+class _FetchSignals(QObject):
+    """Signals for StockFetcher (a QRunnable can't define its own)."""
 
     finished = Signal(list)  # Emits list of Stock objects
 
-    def __init__(self, symbols: list[str], chart_period: str = "1mo", parent=None):
-        super().__init__(parent)
+
+class StockFetcher(QRunnable):
+    """Background task for fetching stock data."""
+
+    def __init__(self, symbols: list[str], chart_period: str = "1mo",
+                 names: dict[str, str] | None = None, session=None,
+                 history_cache: dict | None = None):
+        super().__init__()
+        self.setAutoDelete(False)  # Owned by StockService until it finishes
         self.symbols = symbols
         self.chart_period = chart_period
+        self.names = names if names is not None else {}  # Known display names
+        self.session = session  # HTTP session for yfinance (None = its default)
+        # Daily-bar histories by (symbol, period, interval) -> (fetch date, closes)
+        self.history_cache = history_cache if history_cache is not None else {}
+        self.signals = _FetchSignals()
 
     def run(self):
         """Fetch stock data for all symbols."""
+        self.signals.finished.emit(self.fetch_all())
+
+    def fetch_all(self) -> list[Stock]:
+        """Fetch all symbols with batched downloads.
+
+        One download covers the chart history of every symbol; with daily
+        bars its last two closes double as price and previous close,
+        otherwise a second daily download provides them. Symbols missing
+        from the batch are fetched individually.
+        """
+        interval = _history_interval(self.chart_period)
+        if interval == "1d":
+            histories, quotes = self._fetch_daily()
+        else:
+            histories = self._download(self.symbols, self.chart_period, interval)
+            quotes = self._download(self.symbols, "5d", "1d")
+
         stocks = []
         for symbol in self.symbols:
-            stock = self._fetch_single(symbol)
-            stocks.append(stock)
-        self.finished.emit(stocks)
+            quote = quotes.get(symbol)
+            if quote is None:
+                stocks.append(self._fetch_single(symbol))
+                continue
+            history = histories.get(symbol)
+            stocks.append(self._build_stock(
+                symbol, quote,
+                history.to_numpy(dtype=np.float32) if history is not None else _NO_HISTORY,
+            ))
+        return stocks
+
+    def _fetch_daily(self) -> tuple[dict, dict]:
+        """Fetch daily-bar histories and quotes, using the history cache.
+
+        Older daily bars don't change, so symbols with a history fetched
+        earlier today only download the last few days, which are spliced
+        onto the cached series. Entries from earlier days, for other
+        periods or for symbols no longer tracked are dropped, so the cache
+        doesn't grow for the life of the app. Returns (histories, quotes)
+        by symbol.
+        """
+        today = date.today()
+        wanted = {(symbol, self.chart_period, "1d") for symbol in self.symbols}
+        for key in [key for key, (day, _) in self.history_cache.items()
+                    if day != today or key not in wanted]:
+            del self.history_cache[key]
+        cached = {}
+        for symbol in self.symbols:
+            entry = self.history_cache.get((symbol, self.chart_period, "1d"))
+            if entry is not None:
+                cached[symbol] = entry[1]
+
+        missing = [symbol for symbol in self.symbols if symbol not in cached]
+        histories = self._download(missing, self.chart_period, "1d") if missing else {}
+        for symbol, history in histories.items():
+            self.history_cache[(symbol, self.chart_period, "1d")] = (today, history)
+        quotes = histories.copy()
+
+        if cached:
+            recent = self._download(list(cached), "5d", "1d")
+            for symbol, closes in recent.items():
+                histories[symbol] = closes.combine_first(cached[symbol])
+                quotes[symbol] = closes
+        return histories, quotes
+
+    def _download(self, symbols: list[str], period: str, interval: str) -> dict:
+        """Download closing prices for the given symbols, keyed by symbol.
+
+        Symbols without data are left out; an empty dict is returned if
+        the whole download fails.
+        """
+        try:
+            data = yf.download(
+                symbols, period=period, interval=interval,
+                group_by="ticker", threads=True, progress=False,
+                session=self.session,
+            )
+            if data is None or data.empty:
+                return {}
+
+            closes = {}
+            downloaded = set(data.columns.get_level_values(0))
+            for symbol in symbols:
+                if symbol in downloaded:
+                    close = data[symbol]["Close"].dropna()
+                    if not close.empty:
+                        closes[symbol] = close
+            return closes
+        except Exception:  # noqa: BLE001 - yfinance raises arbitrary errors; fall back per symbol
+            return {}
+
+    def _build_stock(self, symbol: str, quote, history: np.ndarray) -> Stock:
+        """Create a Stock from its daily closes and chart history."""
+        price = float(quote.iloc[-1])
+        prev_close = float(quote.iloc[-2]) if len(quote) > 1 else 0
+
+        # Calculate change
+        change = price - prev_close if prev_close else 0
+        change_percent = (change / prev_close * 100) if prev_close else 0
+
+        return Stock(
+            symbol=symbol,
+            name=self.names.get(symbol) or self._lookup_name(symbol),
+            price=price,
+            change=change,
+            change_percent=change_percent,
+            prev_close=prev_close,
+            last_updated=datetime.now(),
+            history=history,
+        )
+
+    def _lookup_name(self, symbol: str, ticker=None) -> str:
+        """Fetch the display name for a symbol, falling back to the symbol."""
+        try:
+            info = (ticker or yf.Ticker(symbol, session=self.session)).get_info()
+            return info.get("shortName") or info.get("longName") or symbol
+        except Exception:  # noqa: BLE001 - a missing name shouldn't fail the quote
+            return symbol
 
     def _fetch_single(self, symbol: str) -> Stock:
         """Fetch data for a single stock symbol."""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            ticker = yf.Ticker(symbol, session=self.session)
+            # fast_info reads the chart metadata instead of the much slower
+            # quoteSummary scrape behind .info
+            quote = ticker.fast_info
 
             # Get current price - try multiple fields
-            price = info.get("regularMarketPrice") or info.get("currentPrice", 0)
-            prev_close = info.get("regularMarketPreviousClose") or info.get("previousClose", 0)
+            price = quote.get("last_price") or 0
+            prev_close = (quote.get("regular_market_previous_close")
+                          or quote.get("previous_close") or 0)
 
             # Calculate change
             change = price - prev_close if prev_close else 0
             change_percent = (change / prev_close * 100) if prev_close else 0
 
-            # Get name
-            name = info.get("shortName") or info.get("longName") or symbol
+            # Get name (only scraped the first time a symbol is seen)
+            name = self.names.get(symbol) or self._lookup_name(symbol, ticker)
 
             # Fetch historical data for chart
             history = self._fetch_history(ticker)
@@ -63,24 +228,18 @@ class StockFetcher(QThread):
                 last_updated=datetime.now(),
             )
 
-    def _fetch_history(self, ticker) -> list[float]:
+    def _fetch_history(self, ticker) -> np.ndarray:
         """Fetch historical price data for charting."""
         try:
-            # Determine interval based on period
-            interval = "1d"
-            if self.chart_period == "1d":
-                interval = "5m"
-            elif self.chart_period == "5d":
-                interval = "15m"
-
+            interval = _history_interval(self.chart_period)
             hist = ticker.history(period=self.chart_period, interval=interval)
             if hist.empty:
-                return []
+                return _NO_HISTORY
 
-            # Return closing prices as list
-            return hist["Close"].tolist()
+            # Return closing prices as a float32 array
+            return hist["Close"].to_numpy(dtype=np.float32)
         except Exception:
-            return []
+            return _NO_HISTORY
 
 
 class StockService(QObject):
@@ -93,7 +252,18 @@ class StockService(QObject):
         self.refresh_interval = refresh_interval
         self.chart_period = chart_period
         self.symbols: list[str] = []
-        self._fetcher: StockFetcher | None = None
+        self._stocks: dict[str, Stock] = {}  # Latest fetched data by symbol
+        self._names: dict[str, str] = {}  # Display names, which rarely change
+        # Daily-bar histories, shared with the fetcher (only one runs at a time)
+        self._history_cache: dict = {}
+        self._fetcher: StockFetcher | None = None  # Fetch in progress, if any
+        self._refresh_pending = False  # refresh() was called during a fetch
+        self._session = _create_session()  # Shared by all fetches
+
+        # Fetches run on one persistent worker thread instead of a new
+        # QThread per refresh; yf.download parallelizes the requests itself
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
 
         # Setup auto-refresh timer
         self._timer = QTimer(self)
@@ -103,6 +273,20 @@ class StockService(QObject):
         """Set the list of symbols to track."""
         self.symbols = symbols.copy()
 
+    def reorder_symbols(self, symbols: list[str]) -> None:
+        """Change the order of tracked symbols without refetching.
+
+        Re-emits the cached stock data in the new order.
+        """
+        self.symbols = symbols.copy()
+        stocks = self.cached_stocks()
+        if stocks:
+            self.stocks_updated.emit(stocks)
+
+    def cached_stocks(self) -> list[Stock]:
+        """Return the most recently fetched data for tracked symbols, in order."""
+        return [self._stocks[symbol] for symbol in self.symbols if symbol in self._stocks]
+
     def add_symbol(self, symbol: str) -> None:
         """Add a symbol to track."""
         symbol = symbol.upper().strip()
@@ -123,27 +307,44 @@ class StockService(QObject):
     def stop(self) -> None:
         """Stop the stock service."""
         self._timer.stop()
-        if self._fetcher and self._fetcher.isRunning():
-            self._fetcher.quit()
-            self._fetcher.wait(2000)  # Wait max 2 seconds
-            if self._fetcher.isRunning():
-                self._fetcher.terminate()
+        self._refresh_pending = False
+        self._pool.waitForDone(2000)  # Wait max 2 seconds
 
+    @Slot()
     def refresh(self) -> None:
         """Trigger a manual refresh of stock data."""
-        if self._fetcher and self._fetcher.isRunning():
-            return  # Already fetching
+        if self._fetcher is not None:
+            # Already fetching; fetch again once it's done, since the symbols
+            # or chart period may have changed since it started
+            self._refresh_pending = True
+            return
 
         if not self.symbols:
             return
 
-        self._fetcher = StockFetcher(self.symbols, self.chart_period, self)
-        self._fetcher.finished.connect(self._on_fetch_complete)
-        self._fetcher.start()
+        self._fetcher = StockFetcher(
+            self.symbols.copy(), self.chart_period, self._names.copy(),
+            self._session, self._history_cache,
+        )
+        self._fetcher.signals.finished.connect(self._on_fetch_complete)
+        self._pool.start(self._fetcher)
 
+    @Slot(list)
     def _on_fetch_complete(self, stocks: list[Stock]) -> None:
         """Handle completed stock fetch."""
-        self.stocks_updated.emit(stocks)
+        self._fetcher = None
+        self._stocks = {stock.symbol: stock for stock in stocks}
+        # Remember names that were actually resolved so they aren't looked up again
+        self._names.update(
+            (stock.symbol, stock.name) for stock in stocks
+            if stock.error is None and stock.name != stock.symbol
+        )
+        # Emit in the current order, which may have changed during the fetch
+        self.stocks_updated.emit(self.cached_stocks())
+
+        if self._refresh_pending:
+            self._refresh_pending = False
+            self.refresh()
 
     def set_refresh_interval(self, seconds: int) -> None:
         """Update the refresh interval."""
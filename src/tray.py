@@ -1,12 +1,24 @@
 """System tray icon and menu management."""
 
-from PySide6.QtCore import Signal, QObject
+import functools
+
+from PySide6.QtCore import Signal, Slot, QObject
 from PySide6.QtGui import QIcon, QAction, QPixmap, QPainter, QColor, QFont
 from PySide6.QtWidgets import QSystemTrayIcon, QMenu
 
 
 def create_default_icon() -> QIcon:
-    """Create a simple stock chart icon programmatically."""
+    """Create a simple stock chart icon programmatically.
+
+    The icon is painted once; later calls return a (cheap, implicitly
+    shared) copy of it.
+    """
+    return QIcon(_default_icon())
+
+
+@functools.cache
+def _default_icon() -> QIcon:
+    """Paint the default icon (requires a QApplication)."""
     size = 64
     pixmap = QPixmap(size, size)
     pixmap.fill(QColor(0, 0, 0, 0))  # Transparent background
@@ -46,38 +58,48 @@ class SystemTrayManager(QObject):
         self._tray_icon.setIcon(create_default_icon())
         self._tray_icon.setToolTip("Stock Ticker")
 
-        self._setup_menu()
+        self._menu: QMenu | None = None  # Built when first needed, see _ensure_menu
+        self._window_visible = True  # Picks the show/hide action text
+
         self._connect_signals()
 
+    def _ensure_menu(self) -> QMenu:
+        """Return the context menu, building it on first use."""
+        if self._menu is None:
+            self._setup_menu()
+        return self._menu
+
     def _setup_menu(self):
         """Create the right-click context menu."""
         menu = QMenu()
 
         # Show/Hide action
-        self._show_action = QAction("Hide Window", menu)
+        self._show_action = QAction(self._show_action_text(), menu)
         self._show_action.triggered.connect(self.toggle_window.emit)
         menu.addAction(self._show_action)
 
         menu.addSeparator()
 
         # Refresh action
-        refresh_action = QAction("Refresh Now", menu)
-        refresh_action.triggered.connect(self.refresh_requested.emit)
-        menu.addAction(refresh_action)
+        self._refresh_action = QAction("Refresh Now", menu)
+        self._refresh_action.triggered.connect(self.refresh_requested.emit)
+        menu.addAction(self._refresh_action)
 
         menu.addSeparator()
 
         # Quit action
-        quit_action = QAction("Quit", menu)
-        quit_action.triggered.connect(self.quit_requested.emit)
-        menu.addAction(quit_action)
+        self._quit_action = QAction("Quit", menu)
+        self._quit_action.triggered.connect(self.quit_requested.emit)
+        menu.addAction(self._quit_action)
 
         self._tray_icon.setContextMenu(menu)
+        self._menu = menu
 
     def _connect_signals(self):
         """Connect tray icon signals."""
         self._tray_icon.activated.connect(self._on_activated)
 
+    @Slot(QSystemTrayIcon.ActivationReason)
     def _on_activated(self, reason: QSystemTrayIcon.ActivationReason):
         """Handle tray icon activation."""
         if reason == QSystemTrayIcon.Trigger:  # Left click
@@ -85,6 +107,7 @@ class SystemTrayManager(QObject):
 
     def show(self):
         """Show the tray icon."""
+        self._ensure_menu()
         self._tray_icon.show()
 
     def hide(self):
@@ -93,7 +116,13 @@ class SystemTrayManager(QObject):
 
     def update_show_action(self, window_visible: bool):
         """Update the show/hide action text based on window visibility."""
-        self._show_action.setText("Hide Window" if window_visible else "Show Window")
+        self._window_visible = window_visible
+        if self._menu is not None:
+            self._show_action.setText(self._show_action_text())
+
+    def _show_action_text(self) -> str:
+        """Text for the show/hide action given the window visibility."""
+        return "Hide Window" if self._window_visible else "Show Window"
 
     def show_message(self, title: str, message: str,
                      icon: QSystemTrayIcon.MessageIcon = QSystemTrayIcon.Information,
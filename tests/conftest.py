@@ -1,24 +1,136 @@
 """Shared pytest fixtures for stock ticker app tests."""
 
+import json
+import os
+import shutil
+import sys
+from contextlib import contextmanager
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
+import numpy as np
+import pandas as pd
 import pytest
-from PySide6.QtWidgets import QApplication
 
 from src.models import Stock, AppConfig
 
+# Shared by the session-scoped sample fixtures; tests only read these
+_FIXED_TS = datetime(2024, 1, 1)
+
+# Contents of seeded_config_file
+SEEDED_CONFIG = {
+    "watchlist": ["TSLA", "NVDA"],
+    "refresh_interval": 120,
+    "popup_position": [300, 300],
+    "popup_size": [500, 600],
+    "theme": "dark",
+}
+
+# Built once for mock_yfinance; the fetcher only reads them
+_MOCK_CLOSES = [145.0, 147.0, 148.5, 149.0, 150.25]
+# Batched downloads return columns grouped by ticker
+_MOCK_DOWNLOAD = pd.DataFrame({("AAPL", "Close"): _MOCK_CLOSES})
+
+
+class _TickerStub:
+    """Stand-in for yfinance.Ticker with just the parts the fetcher reads."""
+
+    __slots__ = ("_history", "_info", "fast_info", "info_lookups")
+
+    def __init__(self, fast_info, info, history):
+        self.fast_info = fast_info
+        self._info = info
+        self._history = history
+        self.info_lookups = 0
+
+    def get_info(self):
+        self.info_lookups += 1
+        return self._info
+
+    def history(self, **_):
+        return self._history
+
+
+class _HistoryStub:
+    """Stand-in for the Ticker.history() DataFrame, read via ["Close"]."""
+
+    __slots__ = ("_closes",)
+
+    def __init__(self, closes):
+        self._closes = closes
+
+    @property
+    def empty(self):
+        return not self._closes
+
+    def __getitem__(self, column):
+        if column != "Close":
+            raise KeyError(column)
+        return self
+
+    def to_numpy(self, dtype=None):
+        return np.array(self._closes, dtype=dtype)
+
+
+@contextmanager
+def _assert_emitted(signal):
+    """Collect the argument tuples of each emission of signal in the block.
+
+    Fails if signal wasn't emitted by the end of the block. Meant for
+    signals emitted synchronously by the code under test, so unlike
+    qtbot.waitSignal it doesn't spin the event loop.
+    """
+    emitted = []
+
+    def record(*args):
+        emitted.append(args)
+
+    signal.connect(record)
+    try:
+        yield emitted
+    finally:
+        signal.disconnect(record)
+    assert emitted, "signal was not emitted"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: waits on a background fetch thread")
+
 
 @pytest.fixture(scope="session")
-def qapp():
-    """Create a QApplication instance for the test session."""
-    app = QApplication.instance()
-    if app is None:
-        app = QApplication([])
-    yield app
+def qapp_args():
+    """Arguments for the test QApplication.
 
+    The offscreen platform skips setting up the native windowing and system
+    tray integration, which most tests don't need. It's only forced when
+    QT_QPA_PLATFORM isn't set, so the tray tests can run on a real platform.
+    """
+    if os.environ.get("QT_QPA_PLATFORM"):
+        return [sys.argv[0]]
+    return [sys.argv[0], "-platform", "offscreen"]
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
+def qapp(qapp_args):
+    """Create a QApplication instance for the test session.
+
+    The instance lives until the process exits and is never torn down
+    between tests, so tests must not delete it. Under pytest-xdist each
+    worker process gets its own instance.
+    """
+    # Imported here so tests that don't need Qt skip loading QtWidgets
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication(qapp_args)
+
+
+@pytest.fixture(scope="session")
+def assert_emitted():
+    """Context manager that records a signal's emissions and fails if none."""
+    return _assert_emitted
+
+
+@pytest.fixture(scope="session")
 def sample_stock():
     """Create a sample stock for testing."""
     return Stock(
@@ -27,12 +139,12 @@ def sample_stock():
         price=150.25,
         change=2.50,
         change_percent=1.69,
-        last_updated=datetime.now(),
+        last_updated=_FIXED_TS,
         history=[145.0, 147.0, 148.5, 149.0, 150.25],
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_stock_down():
     """Create a sample stock with negative change."""
     return Stock(
@@ -41,11 +153,11 @@ def sample_stock_down():
         price=140.00,
         change=-3.25,
         change_percent=-2.27,
-        last_updated=datetime.now(),
+        last_updated=_FIXED_TS,
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_stock_flat():
     """Create a sample stock with no change."""
     return Stock(
@@ -54,21 +166,21 @@ def sample_stock_flat():
         price=380.00,
         change=0.0,
         change_percent=0.0,
-        last_updated=datetime.now(),
+        last_updated=_FIXED_TS,
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_stock_error():
     """Create a sample stock with an error."""
     return Stock(
         symbol="INVALID",
         error="Symbol not found",
-        last_updated=datetime.now(),
+        last_updated=_FIXED_TS,
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_config():
     """Create a sample app configuration."""
     return AppConfig(
@@ -92,22 +204,38 @@ def temp_config_file(temp_config_dir):
     return temp_config_dir / "config.json"
 
 
+@pytest.fixture(scope="session")
+def _config_template(tmp_path_factory):
+    """Write the seeded config file once for the session."""
+    path = tmp_path_factory.mktemp("cfg-template") / "config.json"
+    path.write_text(json.dumps(SEEDED_CONFIG))
+    return path
+
+
 @pytest.fixture
-def mock_yfinance():
-    """Mock yfinance Ticker for testing."""
-    import pandas as pd
+def seeded_config_file(_config_template, temp_config_file):
+    """Create a temporary config file holding SEEDED_CONFIG."""
+    shutil.copyfile(_config_template, temp_config_file)
+    return temp_config_file
+
 
+@pytest.fixture(scope="module")
+def _patched_yfinance():
+    """Keep yfinance patched for the rest of the test module."""
     with patch("src.stock_service.yf") as mock_yf:
-        mock_ticker = MagicMock()
-        mock_ticker.info = {
-            "shortName": "Apple Inc.",
-            "regularMarketPrice": 150.25,
-            "regularMarketPreviousClose": 147.75,
-        }
-        # Mock history method to return a DataFrame
-        mock_history = pd.DataFrame({
-            "Close": [145.0, 147.0, 148.5, 149.0, 150.25]
-        })
-        mock_ticker.history.return_value = mock_history
-        mock_yf.Ticker.return_value = mock_ticker
         yield mock_yf
+
+
+@pytest.fixture
+def mock_yfinance(_patched_yfinance):
+    """Mock yfinance Ticker for testing."""
+    mock_yf = _patched_yfinance
+    mock_yf.reset_mock(return_value=True, side_effect=True)
+
+    mock_yf.Ticker.return_value = _TickerStub(
+        {"last_price": 150.25, "regular_market_previous_close": 147.75},
+        {"shortName": "Apple Inc."},
+        _HistoryStub(_MOCK_CLOSES),
+    )
+    mock_yf.download.return_value = _MOCK_DOWNLOAD
+    return mock_yf
@@ -4,136 +4,363 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.app import StockTickerApp
+from src import app as app_module
+from src.app import StockTickerApp, _read_stylesheet
 from src.models import AppConfig
 
 
+class _Fake:
+    """Stub whose only attributes are the mocked methods named in __slots__.
+
+    Unlike a bare MagicMock, touching anything else raises AttributeError.
+    """
+
+    __slots__ = ()
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, MagicMock(name=name))
+
+    def reset(self):
+        """Forget recorded calls and configured return values."""
+        for name in self.__slots__:
+            getattr(self, name).reset_mock(return_value=True, side_effect=True)
+
+
+class _FakeConfigManager(_Fake):
+    """The parts of ConfigManager used by the app."""
+
+    __slots__ = ("flush", "load", "load_geometry", "save_geometry", "schedule_save")
+
+
+class _FakeStockService(_Fake):
+    """The parts of StockService used by the app."""
+
+    __slots__ = (
+        "add_symbol", "cached_stocks", "refresh", "remove_symbol", "reorder_symbols",
+        "set_chart_period", "set_refresh_interval", "set_symbols", "start",
+        "stocks_updated", "stop",
+    )
+
+
+@pytest.fixture(scope="module")
+def _fakes():
+    """Create the ConfigManager and StockService stubs once per module.
+
+    While the module's tests run, src.app builds these in place of the real
+    classes. Tests that use them must reset them first.
+    """
+    manager, service = _FakeConfigManager(), _FakeStockService()
+    real = app_module.ConfigManager, app_module.StockService
+    app_module.ConfigManager = lambda: manager
+    app_module.StockService = lambda *_: service
+    yield manager, service
+    app_module.ConfigManager, app_module.StockService = real
+
+
+def _reset_fakes(fakes):
+    """Reset the stubs and give them the return values the app needs."""
+    mock_manager, mock_service = fakes
+    for fake in fakes:
+        fake.reset()
+    mock_manager.load.return_value = AppConfig()
+    mock_manager.load_geometry.return_value = None
+    # Prevent actual stock fetching
+    mock_service.cached_stocks.return_value = []
+
+
+def _build_app(fakes):
+    """Create an app wired to the stubs."""
+    _reset_fakes(fakes)
+    app = StockTickerApp()
+    app._mock_config_manager, app._mock_stock_service = fakes
+    return app
+
+
+@pytest.fixture(scope="class")
+def _shared_app(qapp, _fakes):
+    """Build one app for the whole test class."""
+    return _build_app(_fakes)
+
+
 class TestStockTickerApp:
     """Tests for the StockTickerApp class."""
 
     @pytest.fixture
-    def app_with_temp_config(self, temp_config_file, qapp):
-        """Create app with temporary config file."""
-        with patch("src.app.ConfigManager") as MockConfigManager:
-            mock_manager = MagicMock()
-            mock_manager.load.return_value = AppConfig()
-            mock_manager.save = MagicMock()
-            mock_manager.update = MagicMock(return_value=AppConfig())
-            MockConfigManager.return_value = mock_manager
-
-            # Prevent actual stock fetching
-            with patch("src.app.StockService") as MockStockService:
-                mock_service = MagicMock()
-                MockStockService.return_value = mock_service
-
-                app = StockTickerApp()
-                app._mock_config_manager = mock_manager
-                app._mock_stock_service = mock_service
-                yield app
-
-    def test_app_creation(self, app_with_temp_config):
-        """Test that app creates all components."""
-        app = app_with_temp_config
+    def app(self, _shared_app, _fakes):
+        """Return the shared app with its config, popup and stubs reset."""
+        app = _shared_app
+        app._refresh_timer.stop()
+        if app._popup is not None:
+            app._popup.blockSignals(True)
+            app._popup.close()
+            app._popup.deleteLater()
+            app._popup = None
+        app._popup_geometry = None
+        app.tray.hide()
+        app.config = AppConfig()
+        app._set_watchlist(app.config.watchlist)
+        _reset_fakes(_fakes)
+        return app
+
+    @pytest.fixture
+    def fresh_app(self, qapp, _fakes):
+        """Create a new app, for tests that quit it or check its construction."""
+        return _build_app(_fakes)
 
+    def test_app_creation(self, app):
+        """Test that app creates all components."""
         assert app.popup is not None
         assert app.tray is not None
         assert app.stock_service is not None
 
-    def test_app_loads_config(self, app_with_temp_config):
-        """Test that app loads configuration."""
-        app = app_with_temp_config
+    def test_popup_built_lazily(self, app):
+        """Test that the popup isn't constructed until first used."""
+        assert app._popup is None
+        popup = app.popup
+        assert app.popup is popup
+
+    def test_popup_shows_cached_stocks(self, app, sample_stock):
+        """Test that a lazily built popup shows data fetched earlier."""
+        app._mock_stock_service.cached_stocks.return_value = [sample_stock]
 
-        app._mock_config_manager.load.assert_called()
+        assert "AAPL" in app.popup._stock_widgets
+
+    def test_stocks_updated_forwarded_to_popup(self, app, sample_stock):
+        """Test that stock updates reach the popup once it exists."""
+        app._on_stocks_updated([sample_stock])  # No popup to update yet
+        assert app._popup is None
+
+        popup = app.popup
+        app._on_stocks_updated([sample_stock])
+
+        assert "AAPL" in popup._stock_widgets
+
+    def test_app_loads_config(self, fresh_app):
+        """Test that app loads configuration."""
+        fresh_app._mock_config_manager.load.assert_called()
 
-    def test_toggle_popup_shows_when_hidden(self, app_with_temp_config):
+    def test_toggle_popup_shows_when_hidden(self, app):
         """Test toggling popup when hidden shows it."""
-        app = app_with_temp_config
         app.popup.hide()
 
         app._toggle_popup()
 
         assert app.popup.isVisible()
 
-    def test_toggle_popup_hides_when_visible(self, app_with_temp_config):
+    def test_toggle_popup_hides_when_visible(self, app):
         """Test toggling popup when visible hides it."""
-        app = app_with_temp_config
         app.popup.show()
 
         app._toggle_popup()
 
         assert not app.popup.isVisible()
 
-    def test_add_stock(self, app_with_temp_config):
+    def test_add_stock(self, app):
         """Test adding a stock."""
-        app = app_with_temp_config
-        app.config.watchlist = ["AAPL"]
+        app._set_watchlist(["AAPL"])
 
         app._add_stock("GOOGL")
 
         assert "GOOGL" in app.config.watchlist
-        app._mock_config_manager.save.assert_called()
+        app._mock_config_manager.schedule_save.assert_called()
 
-    def test_add_stock_uppercase(self, app_with_temp_config):
+    def test_add_stocks_refresh_once(self, app, qtbot):
+        """Test that a burst of additions triggers a single refresh."""
+        app._set_watchlist([])
+
+        for symbol in ("AAPL", "GOOGL", "MSFT"):
+            app._add_stock(symbol)
+
+        app._mock_stock_service.refresh.assert_not_called()
+        qtbot.waitUntil(lambda: app._mock_stock_service.refresh.called, timeout=2000)
+        app._mock_stock_service.refresh.assert_called_once()
+
+    def test_add_stock_uppercase(self, app):
         """Test that added stocks are uppercased."""
-        app = app_with_temp_config
-        app.config.watchlist = []
+        app._set_watchlist([])
 
         app._add_stock("aapl")
 
         assert "AAPL" in app.config.watchlist
 
-    def test_add_stock_no_duplicates(self, app_with_temp_config):
+    def test_add_stock_strips_whitespace(self, app):
+        """Test that whitespace around added symbols is removed."""
+        app._set_watchlist([])
+
+        app._add_stock("  msft ")
+        app._add_stock("   ")
+
+        assert app.config.watchlist == ["MSFT"]
+
+    def test_add_stock_no_duplicates(self, app):
         """Test that duplicate stocks aren't added."""
-        app = app_with_temp_config
-        app.config.watchlist = ["AAPL"]
+        app._set_watchlist(["AAPL"])
 
         app._add_stock("AAPL")
 
         assert app.config.watchlist.count("AAPL") == 1
 
-    def test_remove_stock(self, app_with_temp_config):
+    def test_remove_stock(self, app):
         """Test removing a stock."""
-        app = app_with_temp_config
-        app.config.watchlist = ["AAPL", "GOOGL"]
+        app._set_watchlist(["AAPL", "GOOGL"])
 
         app._remove_stock("AAPL")
 
         assert "AAPL" not in app.config.watchlist
         assert "GOOGL" in app.config.watchlist
-        app._mock_config_manager.save.assert_called()
+        app._mock_config_manager.schedule_save.assert_called()
 
-    def test_remove_nonexistent_stock(self, app_with_temp_config):
+    def test_remove_nonexistent_stock(self, app):
         """Test removing a stock that doesn't exist."""
-        app = app_with_temp_config
-        app.config.watchlist = ["AAPL"]
+        app._set_watchlist(["AAPL"])
 
         app._remove_stock("GOOGL")  # Should not raise
 
         assert app.config.watchlist == ["AAPL"]
 
-    def test_quit_stops_service(self, app_with_temp_config):
+    def test_move_stock(self, app):
+        """Test moving a stock down the watchlist."""
+        app._set_watchlist(["AAPL", "GOOGL", "MSFT"])
+
+        app._move_stock("AAPL", 1)
+
+        assert app.config.watchlist == ["GOOGL", "AAPL", "MSFT"]
+        app._mock_stock_service.reorder_symbols.assert_called_with(["GOOGL", "AAPL", "MSFT"])
+        assert not app._refresh_timer.isActive()
+
+    def test_move_stock_out_of_bounds(self, app):
+        """Test that moving past either end is ignored."""
+        app._set_watchlist(["AAPL", "GOOGL"])
+
+        app._move_stock("AAPL", -1)
+        app._move_stock("GOOGL", 1)
+        app._move_stock("MSFT", 1)
+
+        assert app.config.watchlist == ["AAPL", "GOOGL"]
+
+    def test_remove_then_add_stock(self, app):
+        """Test that a removed stock can be added back."""
+        app._set_watchlist(["AAPL"])
+
+        app._remove_stock("AAPL")
+        app._add_stock("AAPL")
+
+        assert app.config.watchlist == ["AAPL"]
+
+    def test_quit_stops_service(self, fresh_app):
         """Test that quit stops the stock service."""
-        app = app_with_temp_config
+        app = fresh_app
 
-        with pytest.raises(SystemExit):
-            app._quit()
+        app._quit()
 
         app._mock_stock_service.stop.assert_called()
 
-    def test_quit_hides_tray(self, app_with_temp_config):
+    def test_quit_flushes_config(self, fresh_app):
+        """Test that quit writes any pending config save."""
+        app = fresh_app
+
+        app._quit()
+
+        app._mock_config_manager.flush.assert_called()
+
+    def test_quit_hides_tray(self, fresh_app):
         """Test that quit hides the tray."""
-        app = app_with_temp_config
+        app = fresh_app
         app.tray.show()
 
-        with pytest.raises(SystemExit):
-            app._quit()
+        app._quit()
 
         assert not app.tray._tray_icon.isVisible()
 
-    def test_popup_closed_saves_geometry(self, app_with_temp_config):
+    def test_quit_exits_event_loop(self, fresh_app):
+        """Test that quit asks Qt to leave the event loop instead of exiting."""
+        app = fresh_app
+        app.popup.show()
+
+        with patch.object(app.app, "quit") as mock_quit:
+            app._quit()
+
+        mock_quit.assert_called_once()
+        assert not app.popup.isVisible()
+        assert app.popup.signalsBlocked()
+
+    def test_same_refresh_interval_not_saved(self, app):
+        """Test that re-selecting the current interval doesn't save."""
+        app._on_refresh_interval_changed(app.config.refresh_interval)
+
+        app._mock_config_manager.schedule_save.assert_not_called()
+
+    def test_chart_period_change_saved(self, app):
+        """Test that a new chart period is saved and applied."""
+        app._on_chart_period_changed("1y")
+
+        assert app.config.chart_period == "1y"
+        app._mock_config_manager.schedule_save.assert_called_once()
+        app._mock_stock_service.set_chart_period.assert_called_with("1y")
+
+    def test_unchanged_geometry_not_saved(self, app):
+        """Test that closing the popup without moving it doesn't save."""
+        app.popup.resize(400, 500)
+        app._on_popup_closed()
+        app._mock_config_manager.save_geometry.reset_mock()
+
+        app._on_popup_closed()
+
+        app._mock_config_manager.save_geometry.assert_not_called()
+
+    def test_popup_closed_saves_geometry(self, app):
         """Test that closing popup saves its geometry."""
-        app = app_with_temp_config
+        app.popup.resize(400, 500)
 
         app._on_popup_closed()
 
-        app._mock_config_manager.update.assert_called()
+        app._mock_config_manager.save_geometry.assert_called_once_with(app.popup.saveGeometry())
+        app._mock_config_manager.schedule_save.assert_not_called()
+
+    def test_popup_restores_saved_geometry(self, app):
+        """Test that a new popup uses the saved geometry over config defaults."""
+        app.popup.resize(410, 510)
+        app._mock_config_manager.load_geometry.return_value = app.popup.saveGeometry()
+
+        popup = app._create_popup()
+
+        assert popup.get_size() == (410, 510)
+
+    def test_popup_uses_config_geometry_by_default(self, app):
+        """Test that the config size is used when no geometry was saved."""
+        assert app.popup.get_size() == app.config.popup_size
+
+    def test_config_geometry_saved_on_first_close(self, app):
+        """Test that geometry taken from the config is moved to the UI state."""
+        popup = app.popup
+        app._on_popup_closed()
+
+        app._mock_config_manager.save_geometry.assert_called_once_with(popup.saveGeometry())
+
+
+class TestReadStylesheet:
+    """Tests for the cached stylesheet loader."""
+
+    def test_reads_stylesheet(self):
+        """Test that the bundled stylesheet is found."""
+        assert "#PopupWindow" in _read_stylesheet()
+
+    def test_stylesheet_cached(self, tmp_path):
+        """Test that an unchanged stylesheet is only read once."""
+        style_path = tmp_path / "theme.qss"
+        style_path.write_text("QWidget {}")
+
+        with patch.object(app_module, "_STYLE_PATHS", (style_path,)), \
+                patch.object(app_module, "_STYLE_CACHE", None), \
+                patch("builtins.open", wraps=open) as mock_open:
+            assert _read_stylesheet() == "QWidget {}"
+            assert _read_stylesheet() == "QWidget {}"
+
+        assert mock_open.call_count == 1
+
+    def test_missing_stylesheet(self, tmp_path):
+        """Test that a missing stylesheet returns None."""
+        with patch.object(app_module, "_STYLE_PATHS", (tmp_path / "missing.qss",)), \
+                patch.object(app_module, "_STYLE_CACHE", None):
+            assert _read_stylesheet() is None
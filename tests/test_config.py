@@ -1,23 +1,40 @@
 """Tests for configuration management."""
 
 import json
+import os
+import threading
+from unittest.mock import patch
 
+import pytest
+from PySide6.QtCore import QByteArray, QThread
 
-from src.config import ConfigManager
+from src import config as config_module
+from src.config import CONFIG_FORMAT_ENV, ConfigManager
 from src.models import AppConfig
 
+_DEFAULT_WATCHLIST = ("^DJI", "^IXIC", "^GSPC", "^NYA")
+
 
 class TestConfigManager:
     """Tests for the ConfigManager class."""
 
-    def test_load_creates_default_config(self, temp_config_file):
-        """Test loading returns default config when file doesn't exist."""
-        manager = ConfigManager(str(temp_config_file))
-        config = manager.load()
+    @pytest.mark.parametrize("contents, watchlist", [
+        (None, _DEFAULT_WATCHLIST),  # No file yet
+        ("not valid json {{{", _DEFAULT_WATCHLIST),
+        ('{"watchlist": ["AMZN"]}', ("AMZN",)),  # Missing fields
+    ], ids=["missing", "invalid", "partial"])
+    def test_load_uses_defaults(self, temp_config_file, contents, watchlist):
+        """Test that missing, invalid or partial files fall back to defaults."""
+        if contents is not None:
+            temp_config_file.write_text(contents)
+
+        config = ConfigManager(str(temp_config_file)).load()
 
-        assert config.watchlist == ["^DJI", "^IXIC", "^GSPC", "^NYA"]
+        assert tuple(config.watchlist) == watchlist
         assert config.refresh_interval == 60
         assert config.theme == "dark"
+        assert config.popup_position == (100, 100)
+        assert config.popup_size == (320, 400)
 
     def test_save_creates_file(self, temp_config_file):
         """Test saving creates config file."""
@@ -30,19 +47,9 @@ class TestConfigManager:
             data = json.load(f)
         assert data["watchlist"] == ["AAPL", "GOOGL"]
 
-    def test_load_existing_config(self, temp_config_file):
+    def test_load_existing_config(self, seeded_config_file):
         """Test loading an existing config file."""
-        config_data = {
-            "watchlist": ["TSLA", "NVDA"],
-            "refresh_interval": 120,
-            "popup_position": [300, 300],
-            "popup_size": [500, 600],
-            "theme": "dark",
-        }
-        with open(temp_config_file, "w") as f:
-            json.dump(config_data, f)
-
-        manager = ConfigManager(str(temp_config_file))
+        manager = ConfigManager(str(seeded_config_file))
         config = manager.load()
 
         assert config.watchlist == ["TSLA", "NVDA"]
@@ -50,29 +57,13 @@ class TestConfigManager:
         assert config.popup_position == (300, 300)
         assert config.popup_size == (500, 600)
 
-    def test_load_partial_config(self, temp_config_file):
-        """Test loading config with missing fields uses defaults."""
-        config_data = {"watchlist": ["AMZN"]}
-        with open(temp_config_file, "w") as f:
-            json.dump(config_data, f)
+    def test_save_load_without_orjson(self, temp_config_file):
+        """Test the stdlib json fallback when orjson isn't installed."""
+        with patch("src.config.orjson", None):
+            ConfigManager(str(temp_config_file)).save(AppConfig(watchlist=["AMD"]))
+            config = ConfigManager(str(temp_config_file)).load()
 
-        manager = ConfigManager(str(temp_config_file))
-        config = manager.load()
-
-        assert config.watchlist == ["AMZN"]
-        assert config.refresh_interval == 60  # default
-        assert config.theme == "dark"  # default
-
-    def test_load_invalid_json(self, temp_config_file):
-        """Test loading invalid JSON returns default config."""
-        with open(temp_config_file, "w") as f:
-            f.write("not valid json {{{")
-
-        manager = ConfigManager(str(temp_config_file))
-        config = manager.load()
-
-        # Should return defaults
-        assert config.watchlist == ["^DJI", "^IXIC", "^GSPC", "^NYA"]
+        assert config.watchlist == ["AMD"]
 
     def test_update_single_field(self, temp_config_file):
         """Test updating a single config field."""
@@ -118,6 +109,30 @@ class TestConfigManager:
 
         assert config1 is config2
 
+    def test_load_reloads_after_external_edit(self, temp_config_file):
+        """Test that load re-reads the file when it changes on disk."""
+        manager = ConfigManager(str(temp_config_file))
+        manager.save(AppConfig(watchlist=["AAPL"]))
+        assert manager.load().watchlist == ["AAPL"]
+
+        with open(temp_config_file, "w") as f:
+            json.dump({"watchlist": ["TSLA"]}, f)
+        stat = temp_config_file.stat()
+        os.utime(temp_config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert manager.load().watchlist == ["TSLA"]
+
+    def test_defaults_not_shared(self, temp_config_file):
+        """Test that loaded configs don't share the default watchlist."""
+        with open(temp_config_file, "w") as f:
+            json.dump({}, f)
+
+        config = ConfigManager(str(temp_config_file)).load()
+        config.watchlist.append("AAPL")
+
+        other = ConfigManager(str(temp_config_file)).load()
+        assert "AAPL" not in other.watchlist
+
     def test_save_updates_cache(self, temp_config_file):
         """Test that save updates the cached config."""
         manager = ConfigManager(str(temp_config_file))
@@ -139,3 +154,225 @@ class TestConfigManager:
 
         assert isinstance(config.popup_position, tuple)
         assert config.popup_position == (123, 456)
+
+    def test_save_leaves_no_temp_file(self, temp_config_file):
+        """Test that the atomic write cleans up its temp file."""
+        manager = ConfigManager(str(temp_config_file))
+        manager.save(AppConfig())
+
+        assert temp_config_file.exists()
+        assert list(temp_config_file.parent.iterdir()) == [temp_config_file]
+
+    def test_save_skips_unchanged_config(self, temp_config_file):
+        """Test that saving an unchanged config doesn't rewrite the file."""
+        manager = ConfigManager(str(temp_config_file))
+        config = AppConfig(watchlist=["AAPL"])
+        manager.save(config)
+        writes = []
+        with patch("src.config._dumps", side_effect=lambda d, *_: writes.append(d) or b"{}"):
+            manager.save(config)
+            assert writes == []
+
+            config.watchlist.append("GOOGL")  # in-place edits are still detected
+            manager.save(config)
+            assert len(writes) == 1
+
+    def test_save_rewrites_deleted_file(self, temp_config_file):
+        """Test that an unchanged config is rewritten if the file vanished."""
+        manager = ConfigManager(str(temp_config_file))
+        config = AppConfig()
+        manager.save(config)
+        temp_config_file.unlink()
+
+        manager.save(config)
+
+        assert temp_config_file.exists()
+
+    def test_save_fsyncs_before_replace(self, temp_config_file):
+        """Test that the temp file is fsynced once per write."""
+        manager = ConfigManager(str(temp_config_file))
+
+        with patch("src.config.os.fsync") as mock_fsync:
+            manager.save(AppConfig())
+
+        mock_fsync.assert_called_once()
+
+    def test_schedule_save_is_deferred(self, temp_config_file, qapp):
+        """Test that schedule_save doesn't write immediately."""
+        manager = ConfigManager(str(temp_config_file))
+        manager.schedule_save(AppConfig(watchlist=["META"]))
+
+        assert not temp_config_file.exists()
+        assert manager.load().watchlist == ["META"]
+
+    def test_schedule_save_coalesces(self, temp_config_file, qapp, qtbot):
+        """Test that repeated scheduled saves result in a single write."""
+        manager = ConfigManager(str(temp_config_file))
+        config = manager.load()
+        writes = []
+        original_write = manager._write
+        manager._write = lambda c, **kw: (writes.append(c), original_write(c, **kw))
+
+        for symbol in ("AAPL", "GOOGL", "MSFT"):
+            config.watchlist.append(symbol)
+            manager.schedule_save(config)
+
+        qtbot.waitUntil(temp_config_file.exists, timeout=2000)
+        assert len(writes) == 1
+        with open(temp_config_file) as f:
+            data = json.load(f)
+        assert data["watchlist"][-3:] == ["AAPL", "GOOGL", "MSFT"]
+
+    def test_flush_writes_pending_save(self, temp_config_file, qapp):
+        """Test that flush writes a scheduled save immediately."""
+        manager = ConfigManager(str(temp_config_file))
+        manager.schedule_save(AppConfig(watchlist=["NVDA"]))
+        manager.flush()
+
+        with open(temp_config_file) as f:
+            data = json.load(f)
+        assert data["watchlist"] == ["NVDA"]
+
+    def test_scheduled_save_writes_off_gui_thread(self, temp_config_file, qapp, qtbot):
+        """Test that the debounced write runs on the worker thread."""
+        manager = ConfigManager(str(temp_config_file))
+        threads = []
+        original_write_file = config_module._write_file
+
+        def record_thread(path, payload):
+            threads.append(QThread.currentThread())
+            original_write_file(path, payload)
+
+        with patch("src.config._write_file", side_effect=record_thread):
+            manager.schedule_save(AppConfig(watchlist=["AMD"]))
+            qtbot.waitUntil(lambda: len(threads) == 1, timeout=2000)
+            manager.flush()
+
+        assert threads[0] != qapp.thread()
+        assert manager.load().watchlist == ["AMD"]
+
+    def test_flush_waits_for_background_write(self, temp_config_file, qapp):
+        """Test that flush doesn't return while a background write is queued."""
+        manager = ConfigManager(str(temp_config_file))
+        manager.schedule_save(AppConfig(watchlist=["INTC"]))
+        manager._flush_in_background()
+
+        manager.flush()
+
+        with open(temp_config_file) as f:
+            assert json.load(f)["watchlist"] == ["INTC"]
+
+    def test_save_not_overwritten_by_background_write(self, temp_config_file, qapp):
+        """Test that an older queued background write can't clobber save()."""
+        manager = ConfigManager(str(temp_config_file))
+        manager.schedule_save(AppConfig(watchlist=["OLD"]))
+        manager._flush_in_background()
+
+        manager.save(AppConfig(watchlist=["NEW"]))
+        manager.flush()
+
+        with open(temp_config_file) as f:
+            assert json.load(f)["watchlist"] == ["NEW"]
+
+    def test_load_during_background_write_keeps_config(self, temp_config_file, qapp):
+        """Test that load() doesn't re-read a file the worker is still writing."""
+        manager = ConfigManager(str(temp_config_file))
+        config = AppConfig(watchlist=["AMD"])
+        manager.schedule_save(config)
+        written, release = threading.Event(), threading.Event()
+        original_write_file = config_module._write_file
+
+        def write_then_stall(path, payload):
+            original_write_file(path, payload)
+            written.set()
+            release.wait(5)  # Before the worker records the new mtime
+
+        with patch("src.config._write_file", side_effect=write_then_stall):
+            manager._flush_in_background()
+            assert written.wait(5)
+            loaded = manager.load()
+            release.set()
+            manager.flush()
+
+        assert loaded is config
+
+    def test_flush_without_pending_save(self, temp_config_file):
+        """Test that flush does nothing when no save is pending."""
+        manager = ConfigManager(str(temp_config_file))
+        manager.flush()
+
+        assert not temp_config_file.exists()
+
+    def test_geometry_round_trip(self, temp_config_file):
+        """Test that popup geometry persists in the UI state file."""
+        manager = ConfigManager(str(temp_config_file))
+        assert manager.load_geometry() is None
+
+        manager.save_geometry(QByteArray(b"geometry"))
+        manager.flush()
+
+        assert ConfigManager(str(temp_config_file)).load_geometry() == QByteArray(b"geometry")
+        assert not temp_config_file.exists()  # JSON config untouched
+
+    def test_popup_geometry_not_saved(self, seeded_config_file):
+        """Test that legacy popup fields are read but no longer written back."""
+        manager = ConfigManager(str(seeded_config_file))
+        config = manager.load()
+        assert config.popup_position == (300, 300)
+
+        config.watchlist.append("AAPL")
+        manager.save(config)
+
+        with open(seeded_config_file) as f:
+            data = json.load(f)
+        assert "popup_position" not in data
+        assert "popup_size" not in data
+
+    def test_msgpack_round_trip(self, temp_config_dir):
+        """Test saving and loading a .msgpack config."""
+        pytest.importorskip("msgpack")
+        config_path = temp_config_dir / "config.msgpack"
+        ConfigManager(str(config_path)).save(AppConfig(watchlist=["AAPL"], refresh_interval=5))
+
+        config = ConfigManager(str(config_path)).load()
+
+        assert config.watchlist == ["AAPL"]
+        assert config.refresh_interval == 5
+
+    def test_msgpack_format_migrates_json(self, temp_config_dir, monkeypatch):
+        """Test that opting into msgpack converts an existing config.json once."""
+        pytest.importorskip("msgpack")
+        monkeypatch.setenv(CONFIG_FORMAT_ENV, "msgpack")
+        monkeypatch.setattr("src.config.get_config_dir", lambda: temp_config_dir)
+        with open(temp_config_dir / "config.json", "w") as f:
+            json.dump({"watchlist": ["TSLA"]}, f)
+
+        manager = ConfigManager()
+
+        assert manager.config_path == temp_config_dir / "config.msgpack"
+        assert not (temp_config_dir / "config.json").exists()
+        assert manager.load().watchlist == ["TSLA"]
+
+    def test_existing_msgpack_used_without_env(self, temp_config_dir, monkeypatch):
+        """Test that a migrated config is still found once the env var is unset."""
+        pytest.importorskip("msgpack")
+        monkeypatch.delenv(CONFIG_FORMAT_ENV, raising=False)
+        monkeypatch.setattr("src.config.get_config_dir", lambda: temp_config_dir)
+        ConfigManager(str(temp_config_dir / "config.msgpack")).save(AppConfig(watchlist=["TSLA"]))
+
+        manager = ConfigManager()
+
+        assert manager.config_path == temp_config_dir / "config.msgpack"
+        assert manager.load().watchlist == ["TSLA"]
+
+    def test_msgpack_format_without_msgpack_warns(self, temp_config_dir, monkeypatch, caplog):
+        """Test that asking for msgpack without the package falls back to JSON loudly."""
+        monkeypatch.setenv(CONFIG_FORMAT_ENV, "msgpack")
+        monkeypatch.setattr("src.config.get_config_dir", lambda: temp_config_dir)
+        monkeypatch.setattr(config_module, "msgpack", None)
+
+        with caplog.at_level("WARNING", logger="src.config"):
+            manager = ConfigManager()
+
+        assert manager.config_path == temp_config_dir / "config.json"
+        assert CONFIG_FORMAT_ENV in caplog.text
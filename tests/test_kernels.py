@@ -0,0 +1,71 @@
+"""Tests for the numeric chart kernels."""
+
+import numpy as np
+import pytest
+
+from src._kernels import (
+    _sparkline_xy_loop,
+    _sparkline_xy_numpy,
+    build_sparkline_xy,
+    downsample_minmax,
+)
+
+
+@pytest.mark.parametrize("kernel", [_sparkline_xy_loop, _sparkline_xy_numpy, build_sparkline_xy])
+class TestBuildSparklineXY:
+    """Tests for the sparkline coordinate kernels (compiled or not)."""
+
+    def test_scales_to_widget(self, kernel):
+        """Test that values span the widget inside the padding."""
+        out = np.empty((3, 2))
+        values = np.array([10.0, 20.0, 15.0], dtype=np.float32)
+
+        prev_close_y = kernel(values, 0.0, 100.0, 24.0, 2.0, out)
+
+        assert out[:, 0].tolist() == [2.0, 50.0, 98.0]
+        assert out[:, 1].tolist() == [22.0, 2.0, 12.0]
+        assert prev_close_y == -1.0
+
+    def test_range_includes_prev_close(self, kernel):
+        """Test that prev_close widens the range and gets a y coordinate."""
+        out = np.empty((2, 2))
+        values = np.array([15.0, 20.0], dtype=np.float32)
+
+        prev_close_y = kernel(values, 10.0, 100.0, 24.0, 2.0, out)
+
+        assert out[:, 1].tolist() == [12.0, 2.0]
+        assert prev_close_y == 22.0
+
+    def test_flat_values(self, kernel):
+        """Test that a flat series doesn't divide by zero."""
+        out = np.empty((2, 2))
+        kernel(np.array([5.0, 5.0], dtype=np.float32), 0.0, 100.0, 24.0, 2.0, out)
+
+        assert out[:, 1].tolist() == [22.0, 22.0]
+
+
+class TestDownsampleMinmax:
+    """Tests for the min/max envelope downsampling."""
+
+    def test_short_input_unchanged(self):
+        """Test that data fitting two points per bucket is returned as is."""
+        values = np.arange(10, dtype=np.float32)
+        assert downsample_minmax(values, 5) is values
+
+    def test_bounded_output(self):
+        """Test that the output size depends only on the bucket count."""
+        values = np.random.default_rng(0).random(1500).astype(np.float32)
+        out = downsample_minmax(values, 100)
+
+        assert len(out) == 202
+        assert out.dtype == np.float32
+
+    def test_envelope_and_endpoints_kept(self):
+        """Test that the extremes and the first/last values survive."""
+        values = np.array([5, 1, 9, 4, 3, 8, 2, 7, 6], dtype=np.float32)
+        out = downsample_minmax(values, 3)
+
+        assert out[0] == 5 and out[-1] == 6
+        assert out.min() == 1 and out.max() == 9
+        # Buckets [5 1 9] (rising), [4 3 8] (rising), [2 7 6] (rising)
+        assert out.tolist() == [5, 1, 9, 3, 8, 2, 7, 6]
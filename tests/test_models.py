@@ -1,8 +1,19 @@
 """Tests for data models."""
 
+import numpy as np
+import pytest
 
+from src.models import (
+    CHART_PERIOD_LABELS,
+    CHART_PERIODS,
+    REFRESH_INTERVAL_LABELS,
+    REFRESH_INTERVALS,
+    AppConfig,
+    Stock,
+)
 
-from src.models import Stock, AppConfig
+# Tests that only read a default config share this one
+_DEFAULT_CONFIG = AppConfig()
 
 
 class TestStock:
@@ -27,6 +38,17 @@ class TestStock:
         assert stock.change_percent == 0.0
         assert stock.last_updated is None
         assert stock.error is None
+        assert len(stock.history) == 0
+
+    def test_history_stored_as_float32_array(self, sample_stock):
+        """Test that history lists are converted to float32 arrays."""
+        assert isinstance(sample_stock.history, np.ndarray)
+        assert sample_stock.history.dtype == np.float32
+        assert sample_stock.history.tolist() == [145.0, 147.0, 148.5, 149.0, 150.25]
+
+    def test_history_default_not_shared(self):
+        """Test that each stock gets its own default history array."""
+        assert Stock(symbol="A").history is not Stock(symbol="B").history
 
     def test_is_up_positive_change(self, sample_stock):
         """Test is_up property with positive change."""
@@ -55,6 +77,10 @@ class TestStock:
         """Test change_color for zero change."""
         assert sample_stock_flat.change_color == "#9E9E9E"  # Gray
 
+    def test_stock_uses_slots(self):
+        """Test that Stock instances don't carry a per-instance __dict__."""
+        assert not hasattr(Stock(symbol="TEST"), "__dict__")
+
     def test_stock_with_error(self, sample_stock_error):
         """Test stock with error state."""
         assert sample_stock_error.error == "Symbol not found"
@@ -66,7 +92,7 @@ class TestAppConfig:
 
     def test_default_config(self):
         """Test default configuration values."""
-        config = AppConfig()
+        config = _DEFAULT_CONFIG
         assert config.watchlist == ["^DJI", "^IXIC", "^GSPC", "^NYA"]
         assert config.refresh_interval == 60
         assert config.popup_position == (100, 100)
@@ -88,7 +114,47 @@ class TestAppConfig:
         config1.watchlist.append("AAPL")
         assert "AAPL" not in config2.watchlist
 
+    def test_config_uses_slots(self):
+        """Test that AppConfig rejects unknown attributes."""
+        config = _DEFAULT_CONFIG
+        assert not hasattr(config, "__dict__")
+        with pytest.raises(AttributeError):
+            config.nonexistent_field = "value"
+
     def test_config_with_empty_watchlist(self):
         """Test config with empty watchlist."""
         config = AppConfig(watchlist=[])
         assert config.watchlist == []
+
+    def test_to_json_dict(self, sample_config):
+        """Test conversion to a JSON-serializable dict."""
+        data = sample_config.to_json_dict()
+        assert data == {
+            "watchlist": ["AAPL", "GOOGL", "MSFT"],
+            "refresh_interval": 30,
+            "chart_period": sample_config.chart_period,
+            "theme": "dark",
+        }
+        data["watchlist"].append("TSLA")
+        assert sample_config.watchlist == ["AAPL", "GOOGL", "MSFT"]
+
+
+class TestOptionMappings:
+    """Tests for the refresh interval and chart period option tables."""
+
+    def test_refresh_interval_labels_inverse(self):
+        """Test that the label lookup inverts REFRESH_INTERVALS."""
+        for label, seconds in REFRESH_INTERVALS.items():
+            assert REFRESH_INTERVAL_LABELS[seconds] == label
+
+    def test_chart_period_labels_inverse(self):
+        """Test that the label lookup inverts CHART_PERIODS."""
+        for label, period in CHART_PERIODS.items():
+            assert CHART_PERIOD_LABELS[period] == label
+
+    def test_mappings_read_only(self):
+        """Test that the option tables can't be mutated."""
+        with pytest.raises(TypeError):
+            REFRESH_INTERVALS["2 min"] = 120
+        with pytest.raises(TypeError):
+            CHART_PERIOD_LABELS["2y"] = "2 year"
@@ -1,33 +1,226 @@
 """Tests for the popup window."""
 
+from itertools import pairwise
+from unittest.mock import MagicMock, patch
 
-from PySide6.QtCore import Qt
+import numpy as np
+import pytest
+import shiboken6
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QPolygonF
 
 from src.models import Stock
-from src.popup import PopupWindow, StockItemWidget
+from src.popup import (
+    MAX_POLYLINE_POINTS,
+    WIDGET_POOL_SIZE,
+    PopupWindow,
+    SparklineWidget,
+    StockItemWidget,
+    _polygon_view,
+    _split_polyline,
+)
+
+
+class TestSparklineWidget:
+    """Tests for the SparklineWidget class."""
+
+    def test_polygon_view(self):
+        """Test that writes to the view land in the polygon's points."""
+        polygon = QPolygonF()
+        polygon.resize(2)
+        _polygon_view(polygon)[:] = np.array([[1.0, 2.0], [3.0, 4.5]])
+
+        assert polygon.at(0) == QPointF(1.0, 2.0)
+        assert polygon.at(1) == QPointF(3.0, 4.5)
+        assert _polygon_view(QPolygonF()).shape == (0, 2)
+
+    def test_split_polyline_short(self):
+        """Test that short lines are drawn as a single polyline."""
+        polygon = QPolygonF()
+        polygon.resize(MAX_POLYLINE_POINTS)
+        assert _split_polyline(polygon, _polygon_view(polygon)) == [polygon]
+
+    def test_split_polyline_long(self):
+        """Test that long lines are split into connected segments."""
+        points = np.column_stack((np.arange(600.0), np.zeros(600)))
+        polygon = QPolygonF()
+        polygon.resize(600)
+        _polygon_view(polygon)[:] = points
+
+        segments = _split_polyline(polygon, _polygon_view(polygon))
+
+        assert all(seg.size() <= MAX_POLYLINE_POINTS for seg in segments)
+        assert segments[0].at(0) == QPointF(0.0, 0.0)
+        assert segments[-1].at(segments[-1].size() - 1) == QPointF(599.0, 0.0)
+        for prev, seg in pairwise(segments):
+            assert prev.at(prev.size() - 1) == seg.at(0)
+        assert sum(seg.size() for seg in segments) == 600 + len(segments) - 1
+
+    def test_long_history_downsampled_to_width(self, qapp):
+        """Test that the line has about two points per pixel column at most."""
+        sparkline = SparklineWidget()
+        sparkline.resize(100, 24)
+        sparkline.set_data(np.linspace(1.0, 2.0, 2000))
+        sparkline._build_geometry()
+
+        assert sparkline._line_poly.size() == 2 * 96 + 2
+
+    def test_fill_polygon_closed_along_bottom(self, qapp):
+        """Test that the fill is the line plus two points on the bottom edge."""
+        sparkline = SparklineWidget()
+        sparkline.resize(100, 24)
+        sparkline.set_data([10.0, 20.0])
+        sparkline._build_geometry()
+
+        fill = sparkline._fill_poly
+        assert fill.size() == 4
+        assert fill.at(0) == QPointF(2.0, 22.0)
+        assert fill.at(1) == sparkline._line_poly.at(0)
+        assert fill.at(3) == QPointF(98.0, 22.0)
+
+    def test_line_polygon_reused_for_same_length(self, qapp):
+        """Test that new data of the same length refills the same polygon."""
+        sparkline = SparklineWidget()
+        sparkline.resize(100, 24)
+        sparkline.set_data([10.0, 20.0])
+        sparkline._build_geometry()
+        line_poly = sparkline._line_poly
+        old_fill = sparkline._fill_poly
+
+        sparkline.set_data([20.0, 10.0])
+        sparkline._build_geometry()
+
+        assert sparkline._line_poly is line_poly
+        assert line_poly.at(0) == QPointF(2.0, 2.0)
+        assert old_fill.at(1) == QPointF(2.0, 22.0)  # Fill has its own copy
+
+    def test_points_scaled_to_widget(self, qapp):
+        """Test that data is scaled to span the widget inside the padding."""
+        sparkline = SparklineWidget()
+        sparkline.resize(100, 24)
+        sparkline.set_data([10.0, 20.0, 15.0])
+        sparkline._build_geometry()
+
+        points = sparkline._points
+        assert points[:, 0].tolist() == [2.0, 50.0, 98.0]
+        assert points[:, 1].tolist() == [22.0, 2.0, 12.0]
+        assert sparkline._prev_close_y is None
+
+    def test_geometry_cached_between_paints(self, qapp, qtbot):
+        """Test that repainting reuses the cached polygons."""
+        sparkline = SparklineWidget()
+        qtbot.addWidget(sparkline)
+        sparkline.set_data([1.0, 2.0, 1.5])
+        sparkline.show()
+        qtbot.waitUntil(lambda: not sparkline._geometry_dirty)
+        line_poly = sparkline._line_poly
+        assert line_poly.size() == 3
+        assert sparkline._fill_poly.size() == 5
+
+        sparkline.repaint()
+        assert sparkline._line_poly is line_poly
+
+    def test_pixmap_cached_between_paints(self, qapp, qtbot):
+        """Test that the chart is rendered once and then blitted."""
+        sparkline = SparklineWidget()
+        qtbot.addWidget(sparkline)
+        sparkline.set_data([1.0, 2.0, 1.5])
+        sparkline.show()
+        qtbot.waitUntil(lambda: sparkline._pixmap is not None)
+        pixmap = sparkline._pixmap
+        assert pixmap.deviceIndependentSize().toSize() == sparkline.size()
+
+        sparkline.repaint()
+        assert sparkline._pixmap is pixmap
+
+        sparkline.set_data([1.5, 2.0, 1.0])
+        assert sparkline._pixmap is None
+
+    def test_antialiasing_only_when_tall(self, qapp):
+        """Test that short sparklines are drawn without antialiasing."""
+        sparkline = SparklineWidget()
+        sparkline.set_data([1.0, 2.0])
+        hints = []
+
+        for height in (22, 25):
+            sparkline.resize(100, height)
+            painter = MagicMock()
+            sparkline._draw(painter)
+            hints.append(painter.setRenderHint.called)
+
+        assert hints == [False, True]
+
+    def test_set_data_coalesces_updates(self, qapp, qtbot):
+        """Test that several set_data calls in one loop turn update once."""
+        sparkline = SparklineWidget()
+
+        with patch.object(sparkline, "update") as mock_update:
+            sparkline.set_data([1.0, 2.0])
+            sparkline.set_data([2.0, 3.0])
+            sparkline.set_data([3.0, 1.0])
+            mock_update.assert_not_called()
+            qtbot.waitUntil(lambda: mock_update.call_count == 1)
+
+        assert not sparkline._update_pending
+
+    def test_pending_update_dropped_with_widget(self, qapp, qtbot):
+        """Test that a widget deleted before its coalesced update doesn't get it."""
+        sparkline = SparklineWidget()
+        sparkline.set_data([1.0, 2.0])
+        flushed = []
+        sparkline._flush_update = lambda: flushed.append(True)
+
+        shiboken6.delete(sparkline)
+        qtbot.wait(10)
+
+        assert flushed == []
+
+    def test_set_data_unchanged_keeps_geometry(self, qapp):
+        """Test that setting identical data doesn't invalidate the cache."""
+        sparkline = SparklineWidget()
+        sparkline.set_data([1.0, 2.0], prev_close=1.5)
+        sparkline.grab()
+        line_poly = sparkline._line_poly
+
+        sparkline.set_data([1.0, 2.0], prev_close=1.5)
+        assert sparkline._line_poly is line_poly
+
+        sparkline.set_data([1.0, 2.0], prev_close=1.2)
+        assert sparkline._geometry_dirty
+
+    def test_geometry_invalidated(self, qapp):
+        """Test that cached geometry is dropped on new data and on resize."""
+        sparkline = SparklineWidget()
+        sparkline.set_data([1.0, 2.0])
+        sparkline.grab()
+        assert not sparkline._geometry_dirty
+
+        sparkline.set_data([2.0, 1.0])
+        assert sparkline._geometry_dirty
+
+        sparkline.resize(120, 24)
+        sparkline.grab()
+        assert sparkline._points[-1, 0] == 118.0
+
+    def test_paint_with_prev_close(self, qapp):
+        """Test painting with a previous close line inside the range."""
+        sparkline = SparklineWidget()
+        sparkline.set_data([1.0, 3.0, 2.0], is_up=False, prev_close=2.5)
+        assert not sparkline.grab().isNull()
+        assert sparkline._prev_close_y is not None
 
 
 class TestStockItemWidget:
     """Tests for the StockItemWidget class."""
 
-    def test_widget_creation(self, qapp, sample_stock):
-        """Test creating a stock item widget."""
+    def test_widget_displays_stock(self, qapp, sample_stock):
+        """Test the symbol, price (without $ symbol) and positive change display."""
         widget = StockItemWidget(sample_stock)
 
         assert widget.stock.symbol == "AAPL"
         assert widget.symbol_label.text() == "AAPL"
-
-    def test_widget_displays_price(self, qapp, sample_stock):
-        """Test that price is displayed correctly (without $ symbol)."""
-        widget = StockItemWidget(sample_stock)
-
         assert "150.25" in widget.price_label.text()
         assert "$" not in widget.price_label.text()
-
-    def test_widget_displays_positive_change(self, qapp, sample_stock):
-        """Test positive change display."""
-        widget = StockItemWidget(sample_stock)
-
         change_text = widget.change_label.text()
         assert "+2.50" in change_text
         assert "+1.69%" in change_text
@@ -73,19 +266,114 @@ class TestStockItemWidget:
 
         assert "155.00" in widget.price_label.text()
 
-    def test_remove_clicked_signal(self, qapp, sample_stock, qtbot):
+    def test_update_unchanged_stock_skipped(self, qapp, sample_stock):
+        """Test that an identical refresh doesn't redraw or animate."""
+        widget = StockItemWidget(sample_stock)
+        same = Stock(
+            symbol="AAPL", name="Apple Inc.", price=150.25, change=2.50,
+            change_percent=1.69, history=[145.0, 147.0, 148.5, 149.0, 150.25],
+        )
+
+        with patch.object(widget, "_update_display") as mock_update, \
+                patch.object(widget, "_animate_change") as mock_animate:
+            widget.update_stock(same)
+
+        mock_update.assert_not_called()
+        mock_animate.assert_not_called()
+        assert widget.stock is same
+
+    @pytest.mark.parametrize("history", [
+        [145.0, 147.0, 148.5, 149.0, 150.0],
+        [145.0, 146.0, 148.5, 149.0, 150.25],  # Revised interior bar
+    ], ids=["last-bar", "interior-bar"])
+    def test_update_history_change_redraws(self, qapp, sample_stock, history):
+        """Test that a changed history is drawn even at the same price."""
+        widget = StockItemWidget(sample_stock)
+        moved = Stock(
+            symbol="AAPL", name="Apple Inc.", price=150.25, change=2.50,
+            change_percent=1.69, history=history,
+        )
+
+        widget.update_stock(moved)
+
+        assert widget.sparkline.data.tolist() == history
+
+    def test_same_direction_skips_repolish(self, qapp, sample_stock):
+        """Test that the style is only repolished when the color class changes."""
+        widget = StockItemWidget(sample_stock)
+        up_again = Stock(symbol="AAPL", price=151.0, change=3.0)
+        down = Stock(symbol="AAPL", price=140.0, change=-1.0)
+
+        with patch.object(widget.change_label, "style") as mock_style:
+            widget.update_stock(up_again)
+            mock_style.assert_not_called()
+
+            widget.update_stock(down)
+            mock_style.return_value.polish.assert_called_once_with(widget.change_label)
+
+        assert widget.change_label.objectName() == "StockChangeDown"
+
+    def test_rebind(self, qapp, sample_stock, sample_stock_down):
+        """Test that rebinding shows the new stock's data."""
+        widget = StockItemWidget(sample_stock)
+        widget.rebind(sample_stock_down)
+
+        assert widget.stock is sample_stock_down
+        assert widget.symbol_label.text() == "GOOGL"
+        assert "140.00" in widget.price_label.text()
+        assert widget.sparkline.isHidden()
+
+    def test_price_change_flashes(self, qapp, sample_stock, qtbot):
+        """Test that a price change briefly sets the flash style property."""
+        widget = StockItemWidget(sample_stock)
+        widget.update_stock(Stock(symbol="AAPL", price=151.0, change=3.25))
+
+        assert widget.property("flash") is True
+        assert widget.graphicsEffect() is None
+        qtbot.waitUntil(lambda: widget.property("flash") is False, timeout=2000)
+
+    def test_rebind_clears_flash(self, qapp, sample_stock, sample_stock_down):
+        """Test that a recycled widget doesn't keep the old highlight."""
+        widget = StockItemWidget(sample_stock)
+        widget.update_stock(Stock(symbol="AAPL", price=151.0, change=3.25))
+        widget.rebind(sample_stock_down)
+
+        assert widget.property("flash") is False
+        assert not widget._flash_timer.isActive()
+
+    def test_remove_clicked_signal(self, qapp, sample_stock, assert_emitted):
         """Test that remove button emits signal."""
         widget = StockItemWidget(sample_stock)
 
-        with qtbot.waitSignal(widget.remove_clicked) as blocker:
+        with assert_emitted(widget.remove_clicked) as emitted:
             widget.remove_btn.click()
 
-        assert blocker.args[0] == "AAPL"
+        assert emitted == [("AAPL",)]
+
+
+@pytest.fixture(scope="class")
+def _shared_popup(qapp):
+    """Build one popup for the whole test class."""
+    popup = PopupWindow()
+    yield popup
+    popup.close()
 
 
 class TestPopupWindow:
     """Tests for the PopupWindow class."""
 
+    @pytest.fixture
+    def popup(self, _shared_popup):
+        """Return the shared popup with stocks, pooled widgets and input cleared."""
+        popup = _shared_popup
+        popup.update_stocks([])
+        for widget in popup._widget_pool:
+            widget.deleteLater()
+        popup._widget_pool.clear()
+        popup.symbol_input.clear()
+        popup.hide()
+        return popup
+
     def test_popup_creation(self, qapp):
         """Test creating a popup window."""
         popup = PopupWindow()
@@ -107,32 +395,45 @@ class TestPopupWindow:
         assert popup.minimumWidth() == 300
         assert popup.minimumHeight() == 350
 
-    def test_set_position(self, qapp):
+    def test_set_position(self, popup):
         """Test setting popup position."""
-        popup = PopupWindow()
         popup.set_position(200, 300)
 
         pos = popup.get_position()
         assert pos == (200, 300)
 
-    def test_get_size(self, qapp):
+    def test_set_refresh_interval_and_chart_period(self, popup, qtbot):
+        """Test selecting combo entries by value without emitting changes."""
+        with qtbot.assertNotEmitted(popup.refresh_interval_changed), \
+                qtbot.assertNotEmitted(popup.chart_period_changed):
+            popup.set_refresh_interval(300)
+            popup.set_chart_period("1y")
+
+        assert popup.refresh_combo.currentText() == "5 min"
+        assert popup.chart_combo.currentText() == "1 year"
+
+    def test_set_unknown_refresh_interval_ignored(self, popup):
+        """Test that values without a combo entry leave the selection alone."""
+        popup.set_refresh_interval(300)
+        popup.set_refresh_interval(42)
+
+        assert popup.refresh_combo.currentText() == "5 min"
+
+    def test_get_size(self, popup):
         """Test getting popup size."""
-        popup = PopupWindow()
         popup.resize(400, 500)
 
         size = popup.get_size()
         assert size == (400, 500)
 
-    def test_update_stocks_adds_widgets(self, qapp, sample_stock):
+    def test_update_stocks_adds_widgets(self, popup, sample_stock):
         """Test that update_stocks adds stock widgets."""
-        popup = PopupWindow()
         popup.update_stocks([sample_stock])
 
         assert "AAPL" in popup._stock_widgets
 
-    def test_update_stocks_updates_existing(self, qapp, sample_stock):
+    def test_update_stocks_updates_existing(self, popup, sample_stock):
         """Test that update_stocks updates existing widgets."""
-        popup = PopupWindow()
         popup.update_stocks([sample_stock])
 
         updated_stock = Stock(
@@ -147,9 +448,8 @@ class TestPopupWindow:
         assert len(popup._stock_widgets) == 1
         assert popup._stock_widgets["AAPL"].stock.price == 160.00
 
-    def test_update_stocks_removes_old(self, qapp, sample_stock, sample_stock_down):
+    def test_update_stocks_removes_old(self, popup, sample_stock, sample_stock_down):
         """Test that update_stocks removes stocks not in list."""
-        popup = PopupWindow()
         popup.update_stocks([sample_stock, sample_stock_down])
         assert len(popup._stock_widgets) == 2
 
@@ -157,64 +457,99 @@ class TestPopupWindow:
         assert len(popup._stock_widgets) == 1
         assert "GOOGL" not in popup._stock_widgets
 
-    def test_stock_added_signal(self, qapp, qtbot):
+    def test_update_stocks_reorders(self, popup, sample_stock, sample_stock_down):
+        """Test that widgets follow the order of the stock list."""
+        popup.update_stocks([sample_stock, sample_stock_down])
+        popup.update_stocks([sample_stock_down, sample_stock])
+
+        layout = popup.stock_layout
+        assert layout.itemAt(0).widget() is popup._stock_widgets["GOOGL"]
+        assert layout.itemAt(1).widget() is popup._stock_widgets["AAPL"]
+
+    def test_update_stocks_same_order_keeps_layout(self, popup, sample_stock, sample_stock_down):
+        """Test that an unchanged order doesn't move widgets in the layout."""
+        popup.update_stocks([sample_stock, sample_stock_down])
+
+        with patch.object(popup.stock_layout, "insertWidget") as mock_insert:
+            popup.update_stocks([sample_stock, sample_stock_down])
+
+        mock_insert.assert_not_called()
+        assert popup.stock_container.updatesEnabled()
+
+    def test_removed_widget_reused(self, popup, sample_stock, sample_stock_down, assert_emitted):
+        """Test that a removed stock's widget is recycled for the next new one."""
+        popup.update_stocks([sample_stock])
+        widget = popup._stock_widgets["AAPL"]
+
+        popup.update_stocks([sample_stock_down])
+
+        assert popup._stock_widgets["GOOGL"] is widget
+        assert popup._widget_pool == []
+        with assert_emitted(popup.stock_removed) as emitted:
+            widget.remove_btn.click()
+        assert emitted == [("GOOGL",)]
+
+    def test_widget_pool_capped(self, popup):
+        """Test that no more than WIDGET_POOL_SIZE widgets are kept."""
+        stocks = [Stock(symbol=f"S{i}") for i in range(WIDGET_POOL_SIZE + 2)]
+        popup.update_stocks(stocks)
+
+        popup.update_stocks([])
+
+        assert len(popup._widget_pool) == WIDGET_POOL_SIZE
+        assert all(w.isHidden() for w in popup._widget_pool)
+
+    def test_stock_added_signal(self, popup, assert_emitted):
         """Test that adding a stock emits signal."""
-        popup = PopupWindow()
         popup.symbol_input.setText("TSLA")
 
-        with qtbot.waitSignal(popup.stock_added) as blocker:
+        with assert_emitted(popup.stock_added) as emitted:
             popup.symbol_input.returnPressed.emit()
 
-        assert blocker.args[0] == "TSLA"
+        assert emitted == [("TSLA",)]
 
-    def test_stock_added_clears_input(self, qapp):
+    def test_stock_added_clears_input(self, popup):
         """Test that input is cleared after adding."""
-        popup = PopupWindow()
         popup.symbol_input.setText("TSLA")
         popup._on_add_stock()
 
         assert popup.symbol_input.text() == ""
 
-    def test_stock_added_uppercase(self, qapp, qtbot):
+    def test_stock_added_uppercase(self, popup, assert_emitted):
         """Test that symbols are converted to uppercase."""
-        popup = PopupWindow()
         popup.symbol_input.setText("tsla")
 
-        with qtbot.waitSignal(popup.stock_added) as blocker:
+        with assert_emitted(popup.stock_added) as emitted:
             popup._on_add_stock()
 
-        assert blocker.args[0] == "TSLA"
+        assert emitted == [("TSLA",)]
 
-    def test_empty_input_not_added(self, qapp, qtbot):
+    def test_empty_input_not_added(self, popup, qtbot):
         """Test that empty input doesn't emit signal."""
-        popup = PopupWindow()
         popup.symbol_input.setText("")
 
         with qtbot.assertNotEmitted(popup.stock_added):
             popup._on_add_stock()
 
-    def test_closed_signal(self, qapp, qtbot):
+    def test_closed_signal(self, popup, assert_emitted):
         """Test that closing emits closed signal."""
-        popup = PopupWindow()
-
-        with qtbot.waitSignal(popup.closed):
+        with assert_emitted(popup.closed) as emitted:
             popup._on_close()
 
+        assert emitted == [()]
         assert not popup.isVisible()
 
-    def test_stock_removed_signal(self, qapp, sample_stock, qtbot):
+    def test_stock_removed_signal(self, popup, sample_stock, assert_emitted):
         """Test that removing a stock emits signal."""
-        popup = PopupWindow()
         popup.update_stocks([sample_stock])
 
-        with qtbot.waitSignal(popup.stock_removed) as blocker:
+        with assert_emitted(popup.stock_removed) as emitted:
             popup._stock_widgets["AAPL"].remove_btn.click()
 
-        assert blocker.args[0] == "AAPL"
+        assert emitted == [("AAPL",)]
 
-    def test_status_label_updated(self, qapp, sample_stock):
+    def test_status_label_updated(self, popup, sample_stock):
         """Test that status label shows last update time."""
-        popup = PopupWindow()
         popup.update_stocks([sample_stock])
 
         assert "Last updated:" in popup.status_label.text()
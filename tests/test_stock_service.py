@@ -1,14 +1,40 @@
 """Tests for the stock data service."""
 
+from datetime import date, timedelta
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import numpy as np
+import pandas as pd
 import pytest
 
+from src import stock_service
+from src.models import Stock
 from src.stock_service import StockFetcher, StockService
 
 
+@pytest.fixture
+def swap_yf():
+    """Replace the yfinance module used by the service, restoring it afterwards."""
+    old = stock_service.yf
+    yield lambda new: setattr(stock_service, "yf", new)
+    stock_service.yf = old
+
+
+def _fake_yf(fast_info, info, history=None):
+    """Build a minimal stand-in for the yfinance module with a single ticker."""
+    if history is None:
+        history = pd.DataFrame({"Close": [1.0, 2.0]})
+    ticker = SimpleNamespace(
+        fast_info=fast_info,
+        get_info=lambda: info,
+        history=lambda **_: history,
+    )
+    return SimpleNamespace(Ticker=lambda symbol, session=None: ticker)
+
+
 class TestStockFetcher:
-    """Tests for the StockFetcher thread."""
+    """Tests for the StockFetcher task."""
 
     def test_fetcher_creation(self, qapp):
         """Test creating a stock fetcher."""
@@ -26,49 +52,161 @@ class TestStockFetcher:
         assert stock.change == pytest.approx(2.50, rel=0.01)
         assert stock.error is None
 
-    def test_fetch_single_error(self, qapp):
+    def test_fetch_single_history_array(self, qapp, mock_yfinance):
+        """Test that history is returned as a float32 array."""
+        stock = StockFetcher(["AAPL"])._fetch_single("AAPL")
+
+        assert stock.history.dtype == np.float32
+        assert stock.history.tolist() == [145.0, 147.0, 148.5, 149.0, 150.25]
+
+    def test_fetch_single_error(self, qapp, swap_yf):
         """Test fetching with an error."""
-        with patch("src.stock_service.yf") as mock_yf:
-            mock_yf.Ticker.side_effect = Exception("Network error")
+        def ticker(symbol, session=None):
+            raise ConnectionError("Network error")
+        swap_yf(SimpleNamespace(Ticker=ticker))
 
-            fetcher = StockFetcher(["INVALID"])
-            stock = fetcher._fetch_single("INVALID")
+        fetcher = StockFetcher(["INVALID"])
+        stock = fetcher._fetch_single("INVALID")
 
-            assert stock.symbol == "INVALID"
-            assert stock.error == "Network error"
+        assert stock.symbol == "INVALID"
+        assert stock.error == "Network error"
 
-    def test_fetch_calculates_change(self, qapp):
+    def test_fetch_calculates_change(self, qapp, swap_yf):
         """Test that change is calculated correctly."""
-        with patch("src.stock_service.yf") as mock_yf:
-            mock_ticker = MagicMock()
-            mock_ticker.info = {
-                "shortName": "Test Stock",
-                "regularMarketPrice": 100.0,
-                "regularMarketPreviousClose": 95.0,
-            }
-            mock_yf.Ticker.return_value = mock_ticker
-
-            fetcher = StockFetcher(["TEST"])
-            stock = fetcher._fetch_single("TEST")
-
-            assert stock.change == pytest.approx(5.0)
-            assert stock.change_percent == pytest.approx(5.26, rel=0.01)
-
-    def test_fetch_handles_missing_fields(self, qapp):
+        swap_yf(_fake_yf(
+            {"last_price": 100.0, "regular_market_previous_close": 95.0},
+            {"shortName": "Test Stock"},
+        ))
+
+        fetcher = StockFetcher(["TEST"])
+        stock = fetcher._fetch_single("TEST")
+
+        assert stock.change == pytest.approx(5.0)
+        assert stock.change_percent == pytest.approx(5.26, rel=0.01)
+
+    def test_fetch_handles_missing_fields(self, qapp, swap_yf):
         """Test handling of missing price fields."""
-        with patch("src.stock_service.yf") as mock_yf:
-            mock_ticker = MagicMock()
-            mock_ticker.info = {
-                "shortName": "Test Stock",
-                "currentPrice": 50.0,  # Alternative field
-                "previousClose": 48.0,  # Alternative field
-            }
-            mock_yf.Ticker.return_value = mock_ticker
+        swap_yf(_fake_yf(
+            {"last_price": 50.0, "previous_close": 48.0},  # Alternative field
+            {"longName": "Test Stock Inc."},
+        ))
+
+        fetcher = StockFetcher(["TEST"])
+        stock = fetcher._fetch_single("TEST")
+
+        assert stock.price == 50.0
+        assert stock.change == pytest.approx(2.0)
+        assert stock.name == "Test Stock Inc."
+
+    def test_fetch_single_uses_known_name(self, qapp, mock_yfinance):
+        """Test that a cached name skips the slow info lookup."""
+        fetcher = StockFetcher(["AAPL"], names={"AAPL": "Apple"})
+        stock = fetcher._fetch_single("AAPL")
+
+        assert stock.name == "Apple"
+        assert mock_yfinance.Ticker.return_value.info_lookups == 0
+
+    def test_fetch_all_batches_download(self, qapp, mock_yfinance):
+        """Test that daily-bar periods need a single download."""
+        fetcher = StockFetcher(["AAPL"], "1mo", names={"AAPL": "Apple Inc."})
+        stocks = fetcher.fetch_all()
+
+        mock_yfinance.download.assert_called_once()
+        mock_yfinance.Ticker.assert_not_called()
+        assert stocks[0].name == "Apple Inc."
+        assert stocks[0].price == 150.25
+        assert stocks[0].prev_close == 149.0
+        assert stocks[0].history.tolist() == [145.0, 147.0, 148.5, 149.0, 150.25]
+
+    def test_fetch_all_intraday_downloads_quotes(self, qapp, mock_yfinance):
+        """Test that intraday charts download daily bars for the quote."""
+        fetcher = StockFetcher(["AAPL"], "1d", names={"AAPL": "Apple Inc."})
+        fetcher.fetch_all()
+
+        intervals = [c.kwargs["interval"] for c in mock_yfinance.download.call_args_list]
+        assert intervals == ["5m", "1d"]
+
+    def test_fetch_all_looks_up_unknown_names(self, qapp, mock_yfinance):
+        """Test that names not known yet are fetched per symbol."""
+        stocks = StockFetcher(["AAPL"]).fetch_all()
+
+        mock_yfinance.Ticker.assert_called_once_with("AAPL", session=None)
+        assert stocks[0].name == "Apple Inc."
+
+    def test_fetch_all_falls_back_for_missing_symbols(self, qapp, mock_yfinance):
+        """Test that symbols missing from the batch are fetched individually."""
+        fetcher = StockFetcher(["AAPL", "MSFT"], names={"AAPL": "Apple Inc."})
+        stocks = fetcher.fetch_all()
+
+        assert [s.symbol for s in stocks] == ["AAPL", "MSFT"]
+        mock_yfinance.Ticker.assert_called_once_with("MSFT", session=None)
+        assert stocks[1].price == 150.25
+
+    def test_fetch_all_caches_daily_history(self, qapp, mock_yfinance):
+        """Test that a later refresh today only downloads recent bars."""
+        cache = {}
+        names = {"AAPL": "Apple Inc."}
+        StockFetcher(["AAPL"], "1mo", names=names, history_cache=cache).fetch_all()
+        assert cache[("AAPL", "1mo", "1d")][0] == date.today()
+
+        StockFetcher(["AAPL"], "1mo", names=names, history_cache=cache).fetch_all()
+
+        periods = [c.kwargs["period"] for c in mock_yfinance.download.call_args_list]
+        assert periods == ["1mo", "5d"]
+
+    def test_fetch_all_splices_recent_bars(self, qapp, mock_yfinance):
+        """Test that recent bars replace and extend the cached history."""
+        days = pd.date_range("2024-01-01", periods=4)
+        cache = {("AAPL", "1mo", "1d"): (date.today(), pd.Series([1.0, 2.0, 3.0], index=days[:3]))}
+        recent = pd.DataFrame({"Close": [3.5, 4.0]}, index=days[2:])
+        mock_yfinance.download.return_value = pd.concat({"AAPL": recent}, axis=1)
+
+        fetcher = StockFetcher(["AAPL"], "1mo", names={"AAPL": "Apple"}, history_cache=cache)
+        stock = fetcher.fetch_all()[0]
+
+        assert stock.history.tolist() == [1.0, 2.0, 3.5, 4.0]
+        assert stock.price == 4.0
+        assert stock.prev_close == 3.5
 
-            fetcher = StockFetcher(["TEST"])
-            stock = fetcher._fetch_single("TEST")
+    def test_fetch_all_ignores_stale_history_cache(self, qapp, mock_yfinance):
+        """Test that a history cached on an earlier day is refetched in full."""
+        yesterday = date.today() - timedelta(days=1)
+        cache = {("AAPL", "1mo", "1d"): (yesterday, pd.Series([1.0, 2.0]))}
 
-            assert stock.price == 50.0
+        StockFetcher(["AAPL"], "1mo", names={"AAPL": "Apple"}, history_cache=cache).fetch_all()
+
+        assert mock_yfinance.download.call_args.kwargs["period"] == "1mo"
+        assert cache[("AAPL", "1mo", "1d")][0] == date.today()
+
+    def test_fetch_all_prunes_history_cache(self, qapp, mock_yfinance):
+        """Test that stale, other-period and untracked entries are evicted."""
+        yesterday = date.today() - timedelta(days=1)
+        cache = {
+            ("MSFT", "1mo", "1d"): (date.today(), pd.Series([1.0, 2.0])),  # Removed symbol
+            ("AAPL", "1y", "1d"): (date.today(), pd.Series([1.0, 2.0])),  # Other period
+            ("AAPL", "5d", "1d"): (yesterday, pd.Series([1.0, 2.0])),
+        }
+
+        StockFetcher(["AAPL"], "1mo", names={"AAPL": "Apple"}, history_cache=cache).fetch_all()
+
+        assert list(cache) == [("AAPL", "1mo", "1d")]
+
+    def test_fetch_uses_given_session(self, qapp, mock_yfinance):
+        """Test that the session is passed to every yfinance call."""
+        session = MagicMock()
+        StockFetcher(["AAPL", "MSFT"], session=session).fetch_all()
+
+        assert mock_yfinance.download.call_args.kwargs["session"] is session
+        for call in mock_yfinance.Ticker.call_args_list:
+            assert call.kwargs["session"] is session
+
+    def test_fetch_all_download_error(self, qapp, mock_yfinance):
+        """Test that a failed batch download falls back to per-symbol fetches."""
+        mock_yfinance.download.side_effect = Exception("Network error")
+        stocks = StockFetcher(["AAPL"]).fetch_all()
+
+        assert stocks[0].price == 150.25
+        assert stocks[0].error is None
 
 
 class TestStockService:
@@ -80,12 +218,26 @@ class TestStockService:
         assert service.refresh_interval == 30
         assert service.symbols == []
 
-    def test_set_symbols(self, qapp):
-        """Test setting symbols."""
+    @pytest.mark.parametrize("ops, expected", [
+        ([("set_symbols", ["AAPL", "GOOGL"])], ["AAPL", "GOOGL"]),
+        ([("add_symbol", "aapl")], ["AAPL"]),
+        ([("add_symbol", "AAPL"), ("add_symbol", "AAPL"), ("add_symbol", "aapl")], ["AAPL"]),
+        ([("add_symbol", "  AAPL  ")], ["AAPL"]),
+        ([("add_symbol", ""), ("add_symbol", "   ")], []),
+        ([("set_symbols", ["AAPL", "GOOGL"]), ("remove_symbol", "AAPL")], ["GOOGL"]),
+        ([("set_symbols", ["AAPL"]), ("remove_symbol", "aapl")], []),
+        ([("set_symbols", ["AAPL"]), ("remove_symbol", "GOOGL")], ["AAPL"]),  # Should not raise
+    ], ids=[
+        "set", "add_uppercases", "add_no_duplicates", "add_strips_whitespace",
+        "add_empty_ignored", "remove", "remove_case_insensitive", "remove_nonexistent",
+    ])
+    def test_symbol_ops(self, qapp, ops, expected):
+        """Test how setting, adding and removing symbols changes the list."""
         service = StockService()
-        service.set_symbols(["AAPL", "GOOGL"])
+        for method, arg in ops:
+            getattr(service, method)(arg)
 
-        assert service.symbols == ["AAPL", "GOOGL"]
+        assert service.symbols == expected
 
     def test_set_symbols_copies_list(self, qapp):
         """Test that set_symbols creates a copy."""
@@ -96,61 +248,95 @@ class TestStockService:
         original.append("MSFT")
         assert "MSFT" not in service.symbols
 
-    def test_add_symbol(self, qapp):
-        """Test adding a symbol."""
+    def test_reorder_symbols_emits_cached(self, qapp, sample_stock, sample_stock_down):
+        """Test that reordering re-emits cached data without fetching."""
         service = StockService()
-        service.add_symbol("aapl")  # lowercase
+        service.set_symbols(["AAPL", "GOOGL"])
+        service._on_fetch_complete([sample_stock, sample_stock_down])
+        emitted = []
+        service.stocks_updated.connect(emitted.append)
 
-        assert "AAPL" in service.symbols
+        service.reorder_symbols(["GOOGL", "AAPL"])
 
-    def test_add_symbol_no_duplicates(self, qapp):
-        """Test that duplicate symbols are not added."""
+        assert service.symbols == ["GOOGL", "AAPL"]
+        assert [s.symbol for s in emitted[0]] == ["GOOGL", "AAPL"]
+        assert service._fetcher is None
+
+    def test_reorder_symbols_without_cache(self, qapp):
+        """Test that reordering before any fetch emits nothing."""
         service = StockService()
-        service.add_symbol("AAPL")
-        service.add_symbol("AAPL")
-        service.add_symbol("aapl")
+        service.set_symbols(["AAPL", "GOOGL"])
+        emitted = []
+        service.stocks_updated.connect(emitted.append)
+
+        service.reorder_symbols(["GOOGL", "AAPL"])
 
-        assert service.symbols.count("AAPL") == 1
+        assert emitted == []
 
-    def test_add_symbol_strips_whitespace(self, qapp):
-        """Test that whitespace is stripped from symbols."""
+    def test_fetch_complete_uses_current_order(self, qapp, sample_stock, sample_stock_down):
+        """Test that fetch results follow the current symbol order."""
         service = StockService()
-        service.add_symbol("  AAPL  ")
+        service.set_symbols(["GOOGL", "AAPL"])
+        emitted = []
+        service.stocks_updated.connect(emitted.append)
 
-        assert "AAPL" in service.symbols
+        service._on_fetch_complete([sample_stock, sample_stock_down])
 
-    def test_add_empty_symbol_ignored(self, qapp):
-        """Test that empty symbols are ignored."""
+        assert [s.symbol for s in emitted[0]] == ["GOOGL", "AAPL"]
+
+    def test_fetch_complete_caches_names(self, qapp, sample_stock, sample_stock_error):
+        """Test that resolved names are kept for later fetches."""
         service = StockService()
-        service.add_symbol("")
-        service.add_symbol("   ")
+        service._on_fetch_complete([sample_stock, sample_stock_error])
 
-        assert len(service.symbols) == 0
+        assert service._names == {"AAPL": "Apple Inc."}
 
-    def test_remove_symbol(self, qapp):
-        """Test removing a symbol."""
+    def test_session_reused_across_refreshes(self, qapp):
+        """Test that each fetcher gets the service's long-lived session."""
         service = StockService()
-        service.set_symbols(["AAPL", "GOOGL"])
-        service.remove_symbol("AAPL")
+        service.set_symbols(["AAPL"])
 
-        assert "AAPL" not in service.symbols
-        assert "GOOGL" in service.symbols
+        with patch("src.stock_service.StockFetcher") as mock_fetcher, \
+                patch.object(service, "_pool"):
+            service.refresh()
+            service._on_fetch_complete([])
+            service.refresh()
+
+        sessions = [c.args[3] for c in mock_fetcher.call_args_list]
+        assert sessions == [service._session, service._session]
 
-    def test_remove_symbol_case_insensitive(self, qapp):
-        """Test that symbol removal is case insensitive."""
+    def test_refresh_while_fetching_deferred(self, qapp):
+        """Test that a refresh during a fetch runs once that fetch completes."""
         service = StockService()
         service.set_symbols(["AAPL"])
-        service.remove_symbol("aapl")
 
-        assert "AAPL" not in service.symbols
+        with patch("src.stock_service.StockFetcher") as mock_fetcher, \
+                patch.object(service, "_pool") as mock_pool:
+            service.refresh()
+            service.add_symbol("MSFT")
+            service.refresh()
+            service.refresh()
+
+            mock_fetcher.assert_called_once()
+            mock_pool.start.assert_called_once_with(mock_fetcher.return_value)
 
-    def test_remove_nonexistent_symbol(self, qapp):
-        """Test removing a symbol that doesn't exist."""
+            service._on_fetch_complete([Stock(symbol="AAPL")])
+            service._on_fetch_complete([Stock(symbol="AAPL"), Stock(symbol="MSFT")])
+
+        assert mock_fetcher.call_count == 2
+        assert mock_fetcher.call_args.args[0] == ["AAPL", "MSFT"]
+        assert not service._refresh_pending
+
+    def test_fetch_complete_keeps_emitted_histories(self, qapp):
+        """Test that a later fetch doesn't change already emitted histories."""
         service = StockService()
         service.set_symbols(["AAPL"])
-        service.remove_symbol("GOOGL")  # Should not raise
+        first = Stock(symbol="AAPL", history=[5.0, 4.0, 3.0, 2.0, 1.0])
+        service._on_fetch_complete([first])
+
+        service._on_fetch_complete([Stock(symbol="AAPL", history=[1.0, 2.0, 3.0, 4.0, 5.0])])
 
-        assert service.symbols == ["AAPL"]
+        assert first.history.tolist() == [5.0, 4.0, 3.0, 2.0, 1.0]
 
     def test_set_refresh_interval(self, qapp):
         """Test updating refresh interval."""
@@ -174,6 +360,7 @@ class TestStockService:
 
         assert not service._timer.isActive()
 
+    @pytest.mark.slow
     def test_stocks_updated_signal(self, qapp, mock_yfinance, qtbot):
         """Test that stocks_updated signal is emitted."""
         service = StockService()
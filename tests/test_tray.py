@@ -1,126 +1,140 @@
 """Tests for the system tray manager."""
 
+from unittest.mock import patch
+
+import pytest
 from PySide6.QtWidgets import QSystemTrayIcon
 
 from src.tray import SystemTrayManager, create_default_icon
 
 
+@pytest.fixture(scope="module")
+def default_icon(qapp):
+    """Create the default icon once for the module."""
+    return create_default_icon()
+
+
 class TestCreateDefaultIcon:
     """Tests for the create_default_icon function."""
 
-    def test_icon_created(self, qapp):
+    def test_icon_created(self, default_icon):
         """Test that an icon is created."""
-        icon = create_default_icon()
-        assert not icon.isNull()
+        assert not default_icon.isNull()
 
-    def test_icon_has_pixmap(self, qapp):
+    def test_icon_has_pixmap(self, default_icon):
         """Test that icon has a valid pixmap."""
-        icon = create_default_icon()
-        pixmap = icon.pixmap(64, 64)
+        pixmap = default_icon.pixmap(64, 64)
         assert not pixmap.isNull()
         assert pixmap.width() == 64
         assert pixmap.height() == 64
 
+    def test_icon_painted_once(self, qapp):
+        """Test that repeated calls reuse the painted icon."""
+        create_default_icon()
+        with patch("src.tray.QPainter") as mock_painter:
+            icon = create_default_icon()
+
+        mock_painter.assert_not_called()
+        assert not icon.isNull()
+
+
+@pytest.fixture(scope="class")
+def shared_tray(qapp):
+    """Build one tray, with its menu, for the class's tests that only inspect it."""
+    tray = SystemTrayManager()
+    tray._ensure_menu()
+    return tray
+
 
 class TestSystemTrayManager:
     """Tests for the SystemTrayManager class."""
 
-    def test_tray_creation(self, qapp):
-        """Test creating a system tray manager."""
+    @pytest.fixture
+    def tray(self, qapp):
+        """Create a tray for a test that changes its state or emits from it."""
+        return SystemTrayManager()
+
+    @pytest.fixture
+    def shown_tray(self, qapp):
+        """Create and show a tray, skipping before any setup if there's no system tray."""
+        if not QSystemTrayIcon.isSystemTrayAvailable():
+            pytest.skip("No system tray available")
         tray = SystemTrayManager()
-        assert tray._tray_icon is not None
+        tray.show()
+        return tray
 
-    def test_tray_tooltip(self, qapp):
+    def test_tray_creation(self, shared_tray):
+        """Test creating a system tray manager."""
+        assert shared_tray._tray_icon is not None
+
+    def test_tray_tooltip(self, shared_tray):
         """Test tray icon tooltip."""
-        tray = SystemTrayManager()
-        assert tray._tray_icon.toolTip() == "Stock Ticker"
+        assert shared_tray._tray_icon.toolTip() == "Stock Ticker"
 
-    def test_tray_has_context_menu(self, qapp):
+    def test_tray_has_context_menu(self, shared_tray):
         """Test that tray has a context menu."""
-        tray = SystemTrayManager()
-        menu = tray._tray_icon.contextMenu()
-        assert menu is not None
+        assert shared_tray._tray_icon.contextMenu() is shared_tray._menu
 
-    def test_context_menu_actions(self, qapp):
-        """Test context menu has expected actions."""
-        tray = SystemTrayManager()
-        menu = tray._tray_icon.contextMenu()
-        actions = menu.actions()
+    def test_menu_built_lazily(self, tray):
+        """Test that the menu isn't constructed until first needed."""
+        assert tray._menu is None
+        menu = tray._ensure_menu()
+        assert tray._ensure_menu() is menu
+        assert tray._tray_icon.contextMenu() is menu
 
-        action_texts = [a.text() for a in actions if not a.isSeparator()]
-        assert "Hide Window" in action_texts
-        assert "Refresh Now" in action_texts
-        assert "Quit" in action_texts
-
-    def test_toggle_window_signal(self, qapp, qtbot):
-        """Test toggle_window signal is emitted on left click."""
-        tray = SystemTrayManager()
+    def test_show_builds_menu(self, tray):
+        """Test that showing the tray sets up its menu first."""
+        tray.show()
 
-        with qtbot.waitSignal(tray.toggle_window):
-            tray._on_activated(QSystemTrayIcon.Trigger)
+        assert tray._menu is not None
 
-    def test_toggle_window_not_emitted_on_right_click(self, qapp, qtbot):
+    def test_context_menu_actions(self, shared_tray):
+        """Test context menu has expected actions."""
+        menu = shared_tray._menu
+        action_texts = frozenset(a.text() for a in menu.actions() if not a.isSeparator())
+
+        assert {"Hide Window", "Refresh Now", "Quit"} <= action_texts
+
+    @pytest.mark.parametrize("trigger, signal", [
+        (lambda tray: tray._on_activated(QSystemTrayIcon.Trigger), "toggle_window"),
+        (lambda tray: tray._refresh_action.trigger(), "refresh_requested"),
+        (lambda tray: tray._quit_action.trigger(), "quit_requested"),
+    ], ids=["left-click", "refresh", "quit"])
+    def test_signal_emitted(self, tray, assert_emitted, trigger, signal):
+        """Test that a left click or menu action emits its signal."""
+        tray._ensure_menu()
+        with assert_emitted(getattr(tray, signal)):
+            trigger(tray)
+
+    def test_toggle_window_not_emitted_on_right_click(self, tray, qtbot):
         """Test toggle_window not emitted on context menu."""
-        tray = SystemTrayManager()
-
         with qtbot.assertNotEmitted(tray.toggle_window):
             tray._on_activated(QSystemTrayIcon.Context)
 
-    def test_refresh_requested_signal(self, qapp, qtbot):
-        """Test refresh_requested signal from menu."""
-        tray = SystemTrayManager()
-        menu = tray._tray_icon.contextMenu()
-
-        # Find refresh action
-        refresh_action = None
-        for action in menu.actions():
-            if action.text() == "Refresh Now":
-                refresh_action = action
-                break
-
-        with qtbot.waitSignal(tray.refresh_requested):
-            refresh_action.trigger()
-
-    def test_quit_requested_signal(self, qapp, qtbot):
-        """Test quit_requested signal from menu."""
-        tray = SystemTrayManager()
-        menu = tray._tray_icon.contextMenu()
-
-        # Find quit action
-        quit_action = None
-        for action in menu.actions():
-            if action.text() == "Quit":
-                quit_action = action
-                break
+    @pytest.mark.parametrize("visible, text", [
+        (True, "Hide Window"),
+        (False, "Show Window"),
+    ], ids=["visible", "hidden"])
+    def test_update_show_action(self, tray, visible, text):
+        """Test that the show action text follows the window visibility."""
+        tray._ensure_menu()
+        tray.update_show_action(window_visible=visible)
 
-        with qtbot.waitSignal(tray.quit_requested):
-            quit_action.trigger()
+        assert tray._show_action.text() == text
 
-    def test_update_show_action_visible(self, qapp):
-        """Test updating show action when window is visible."""
-        tray = SystemTrayManager()
-        tray.update_show_action(window_visible=True)
-
-        assert tray._show_action.text() == "Hide Window"
-
-    def test_update_show_action_hidden(self, qapp):
-        """Test updating show action when window is hidden."""
-        tray = SystemTrayManager()
+    def test_update_show_action_before_menu_built(self, tray):
+        """Test that a visibility change before the menu exists is applied to it."""
         tray.update_show_action(window_visible=False)
+        tray._ensure_menu()
 
         assert tray._show_action.text() == "Show Window"
 
-    def test_show_tray(self, qapp):
+    def test_show_tray(self, shown_tray):
         """Test showing the tray icon."""
-        tray = SystemTrayManager()
-        tray.show()
-
-        assert tray._tray_icon.isVisible()
+        assert shown_tray._tray_icon.isVisible()
 
-    def test_hide_tray(self, qapp):
+    def test_hide_tray(self, shown_tray):
         """Test hiding the tray icon."""
-        tray = SystemTrayManager()
-        tray.show()
-        tray.hide()
+        shown_tray.hide()
 
-        assert not tray._tray_icon.isVisible()
+        assert not shown_tray._tray_icon.isVisible()